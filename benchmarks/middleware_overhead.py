@@ -0,0 +1,131 @@
+"""
+Per-request overhead of the auth and base-url middleware stack.
+
+Compares the previous BaseHTTPMiddleware based stack (which authenticated every
+request twice) with the pure ASGI middleware, by driving the ASGI app directly
+so no server or client cost is included.
+
+    python -m benchmarks.middleware_overhead [requests]
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from starlette.applications import Starlette
+from starlette.authentication import AuthenticationBackend, AuthenticationError, SimpleUser
+from starlette.middleware import Middleware
+from starlette.middleware.authentication import AuthenticationMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from src.middlewares.authentications import AuthExceptionMiddleware
+from src.middlewares.base import BaseUrlMiddleware
+from src.utils.exception_handlers import exception_handler_base
+from src.utils.storage_backend import storage
+
+
+class CountingBackend(AuthenticationBackend):
+    def __init__(self):
+        self.calls = 0
+
+    async def authenticate(self, conn):
+        self.calls += 1
+        return conn.headers.get("authorization"), SimpleUser("benchmark")
+
+
+class LegacyAuthExceptionMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        try:
+            request.state.credentials = await self.app.backend.authenticate(request)
+        except AuthenticationError as exc:
+            return exception_handler_base(request, exc=str(exc), status_code=401, success=False)
+        return await call_next(request)
+
+
+class LegacyBaseUrlMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        if storage.BASE_URL != str(request.base_url):
+            setattr(storage, "BASE_URL", str(request.base_url))
+        return await call_next(request)
+
+
+async def homepage(request):
+    return PlainTextResponse(request.user.display_name)
+
+
+def build_legacy(backend):
+    return Starlette(
+        routes=[Route("/", homepage)],
+        middleware=[
+            Middleware(LegacyBaseUrlMiddleware),
+            Middleware(LegacyAuthExceptionMiddleware),
+            Middleware(AuthenticationMiddleware, backend=backend),
+        ],
+    )
+
+
+def build_asgi(backend):
+    return Starlette(
+        routes=[Route("/", homepage)],
+        middleware=[
+            Middleware(BaseUrlMiddleware),
+            Middleware(AuthExceptionMiddleware, backend=backend),
+        ],
+    )
+
+
+async def call(app):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/",
+        "raw_path": b"/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver"), (b"authorization", b"Bearer token")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+    messages = iter([{"type": "http.request", "body": b"", "more_body": False}])
+
+    async def receive():
+        return next(messages, {"type": "http.disconnect"})
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app, requests):
+    for _ in range(100):
+        await call(app)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app)
+    return (time.perf_counter() - start) / requests * 1_000_000
+
+
+async def main(requests):
+    results = {}
+    for name, build in (("BaseHTTPMiddleware", build_legacy), ("pure ASGI", build_asgi)):
+        backend = CountingBackend()
+        app = build(backend)
+        micros = await measure(app, requests)
+        results[name] = micros
+        print(f"{name:<20} {micros:8.1f} us/request  authenticate calls/request: "
+              f"{backend.calls / (requests + 100):.0f}")
+
+    saved = results["BaseHTTPMiddleware"] - results["pure ASGI"]
+    print(f"{'saved':<20} {saved:8.1f} us/request")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
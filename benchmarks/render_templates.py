@@ -0,0 +1,73 @@
+"""
+Cost of rendering the email templates with a fresh Environment per call (the
+previous render_template) against the shared, precompiled environment.
+
+Templates are loaded from src/management/html_templates, falling back to the
+fixtures in benchmarks/templates, so the benchmark runs on a clean checkout.
+
+    python -m benchmarks.render_templates [renders]
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from jinja2 import Environment, FileSystemLoader
+
+from src.management.sendgrid import (
+    TEMPLATES_DIR,
+    arender_template,
+    precompile_templates,
+    render_template,
+    template_env,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+SEARCH_PATH = [TEMPLATES_DIR, FIXTURES_DIR]
+
+# the async overlay shares this loader, so both environments see the fixtures
+template_env.loader.searchpath.append(FIXTURES_DIR)
+
+TEMPLATES = {
+    "forgot_password.html": {"username": "benchmark", "activation_code": "123456"},
+    "account_creation.html": {
+        "username": "benchmark",
+        "temporary_password": "Passw0rd@",
+        "YOUR_COMPANY_NAME": "Benchmark Ltd",
+    },
+}
+
+
+def render_uncached(template_name, **context):
+    environment = Environment(loader=FileSystemLoader(searchpath=SEARCH_PATH))
+    return environment.get_template(template_name).render(context)
+
+
+def measure(render, template_name, context, renders):
+    start = time.perf_counter()
+    for _ in range(renders):
+        render(template_name, **context)
+    return (time.perf_counter() - start) / renders * 1_000_000
+
+
+async def ameasure(template_name, context, renders):
+    start = time.perf_counter()
+    for _ in range(renders):
+        await arender_template(template_name, **context)
+    return (time.perf_counter() - start) / renders * 1_000_000
+
+
+def main(renders):
+    precompile_templates()
+    for template_name, context in TEMPLATES.items():
+        uncached = measure(render_uncached, template_name, context, renders)
+        cached = measure(render_template, template_name, context, renders)
+        async_cached = asyncio.run(ameasure(template_name, context, renders))
+        print(f"{template_name:<24} new Environment {uncached:8.1f} us  shared {cached:8.1f} us  "
+              f"shared async {async_cached:8.1f} us  ({uncached / cached:.0f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
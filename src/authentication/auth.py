@@ -1,22 +1,48 @@
+import asyncio
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from threading import Lock
 from pydantic import BaseModel
-from jose import JWTError, jwt
+from jose import JWTError
 
 from fastapi import Depends, HTTPException, Request, status, WebSocket, WebSocketException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 from starlette.authentication import AuthenticationBackend, AuthenticationError
 
 from src.accounts.models import User
-from src.management.settings import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from src.authentication.token import decode_token
+from src.management.database.manager import BaseManager
+from src.management.settings import (
+    SECRET_KEY,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    AUTH_USER_CACHE_TTL,
+    AUTH_USER_CACHE_SIZE,
+    BCRYPT_ROUNDS,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_QUEUE_SIZE,
+)
+from src.utils.cache import TTLCache
 
 # Defining an OAuth2 password bearer schema for token authentication
 oauth2_schema = HTTPBearer()
 
 # Creating a password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated=["auto"])
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated=["auto"], bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt releases the GIL, so a small dedicated thread pool keeps it off the event loop
+password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_password_jobs = 0
+_password_jobs_lock = Lock()
+
+# Detached snapshots of authenticated users keyed by the token subject
+user_cache = TTLCache(maxsize=AUTH_USER_CACHE_SIZE, ttl=AUTH_USER_CACHE_TTL)
 
 
 # Defining a Pydantic model for the Token
@@ -30,6 +56,41 @@ class TokenData(BaseModel):
     email: str | None = None
 
 
+def detached_copy(obj):
+    """Copy the loaded columns of ``obj`` into a new instance that belongs to no session."""
+    mapper = inspect(obj).mapper
+    copy = mapper.class_(**{attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+def get_user_by_subject(email: str) -> User:
+    """
+    Return the valid user for a token subject. Hits are merged into the request's
+    session without a query, so each request still gets its own instance.
+    Raises:
+        User.DoesNotExist: If no valid user has this email.
+    """
+    session = User.objects.db()
+    cached = user_cache.get(email)
+    if cached is None:
+        user = User.valid_objects.get(email=email)
+        user_cache.set(email, detached_copy(user))
+        return user
+
+    return session.merge(cached, load=False)
+
+
+def invalidate_cached_user(model, instance=None):
+    if instance is None:
+        user_cache.clear()
+    else:
+        user_cache.evict(lambda user: user.id == instance.id)
+
+
+BaseManager.add_change_listener(User, invalidate_cached_user)
+
+
 def get_current_user(token: HTTPAuthorizationCredentials = Depends(oauth2_schema)):
     """
     Get the current user based on the provided JWT token.
@@ -50,7 +111,7 @@ def get_current_user(token: HTTPAuthorizationCredentials = Depends(oauth2_schema
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token.credentials, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -59,7 +120,7 @@ def get_current_user(token: HTTPAuthorizationCredentials = Depends(oauth2_schema
         raise credentials_exception
 
     try:
-        user = User.valid_objects.get(email=token_data.email)
+        user = get_user_by_subject(token_data.email)
         return user
     except User.DoesNotExist:
         raise credentials_exception
@@ -74,6 +135,46 @@ def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def _release_password_job(future):
+    global _password_jobs
+    with _password_jobs_lock:
+        _password_jobs -= 1
+
+
+async def run_password_job(func, *args):
+    """
+    Run a hashing call on ``password_executor``. Once PASSWORD_HASH_WORKERS jobs are
+    running and PASSWORD_HASH_QUEUE_SIZE are waiting, new calls are rejected with
+    a 503 instead of piling up behind a login burst.
+    """
+    global _password_jobs
+    with _password_jobs_lock:
+        if _password_jobs >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        _password_jobs += 1
+
+    try:
+        future = password_executor.submit(func, *args)
+    except BaseException:
+        _release_password_job(None)
+        raise
+    # released when the job itself finishes, even if the awaiting request is cancelled
+    future.add_done_callback(_release_password_job)
+    return await asyncio.wrap_future(future)
+
+
+async def ahash_password(password):
+    return await run_password_job(pwd_context.hash, password)
+
+
+async def averify_password(plain_password, hashed_password):
+    return await run_password_job(pwd_context.verify, plain_password, hashed_password)
+
+
 class JWTAuthBackend(AuthenticationBackend):
     """
     This is a custom auth backend class that will allow you to authenticate your request and return auth and user as
@@ -99,7 +200,7 @@ class JWTAuthBackend(AuthenticationBackend):
             # token = token.credentials
             if scheme.lower() != "bearer":
                 return None
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            payload = decode_token(token, SECRET_KEY, algorithms=[ALGORITHM])
         except (ValueError, UnicodeDecodeError, JWTError) as exc:
             raise AuthenticationError(cls.invalid_token_error)
 
@@ -108,7 +209,7 @@ class JWTAuthBackend(AuthenticationBackend):
             raise AuthenticationError(cls.invalid_token_error)
 
         try:
-            user = User.valid_objects.get(email=email)
+            user = get_user_by_subject(email)
             # return user
         except User.DoesNotExist:
             raise AuthenticationError(cls.invalid_token_error)
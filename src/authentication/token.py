@@ -1,11 +1,45 @@
+import hashlib
+import time
 from calendar import timegm
 from datetime import datetime, timedelta
 from typing import Optional, Any
 
 from jose import jwt, JWTError
+from jose.exceptions import ExpiredSignatureError
 from starlette.authentication import AuthenticationError
 
 from src.management import settings
+from src.utils.cache import TTLCache
+
+# verified payloads keyed by a digest of the token and the key that verified it
+verified_tokens = TTLCache(maxsize=settings.JWT_CACHE_SIZE, ttl=settings.JWT_CACHE_TTL)
+
+
+def decode_token(token: str, secret_key: str, algorithms) -> dict:
+    """
+    Same contract as ``jwt.decode``, but a token that was already verified is
+    served from ``verified_tokens`` without checking the signature again.
+    Entries are dropped when the token's ``exp`` claim passes.
+    Raises:
+        JWTError: If the token is invalid or expired.
+    """
+    if isinstance(algorithms, str):
+        algorithms = [algorithms]
+
+    key = hashlib.sha256(f"{secret_key}\x00{algorithms}\x00{token}".encode()).digest()
+    payload = verified_tokens.get(key)
+
+    if payload is None:
+        payload = jwt.decode(token, secret_key, algorithms=algorithms)
+        exp = payload.get("exp")
+        ttl = settings.JWT_CACHE_TTL if exp is None else min(exp - time.time(), settings.JWT_CACHE_TTL)
+        verified_tokens.set(key, payload, ttl=ttl)
+
+    elif payload.get("exp") is not None and payload["exp"] <= time.time():
+        verified_tokens.pop(key)
+        raise ExpiredSignatureError("Signature has expired.")
+
+    return dict(payload)
 
 
 class Token:
@@ -18,7 +52,7 @@ class Token:
         self.lifetime = timedelta(hours=settings.ACCESS_TOKEN_SETTINGS['LIFETIME_IN_HOURS'])
         if token:
             try:
-                self.payload = jwt.decode(
+                self.payload = decode_token(
                     token,
                     self.SECRET_KEY,
                     algorithms=self.ALGORITHM
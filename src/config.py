@@ -4,7 +4,15 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.management.database.pool import (
+    InstrumentedQueuePool,
+    InstrumentedAsyncQueuePool,
+    pool_status,
+)
+from src.management.database.search import SEARCH_BACKENDS
 
 load_dotenv()
 
@@ -24,8 +32,73 @@ This module loads environment variables using python-dotenv to configure various
 BASE_DIR = Path(__file__).resolve().parent
 # Database Configuration:
 # - DATABASE_URL (str): The URL for the application's database.
+# - ASYNC_DATABASE_URL (str): The URL used by the async engine. Defaults to DATABASE_URL
+#   with its driver swapped for the matching asyncio driver.
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def get_async_database_url(url):
+    if not url:
+        return url
+    scheme, separator, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    return f"{ASYNC_DRIVERS.get(dialect, scheme)}{separator}{rest}"
+
+
+ASYNC_DATABASE_URL = os.environ.get("ASYNC_DATABASE_URL") or get_async_database_url(DATABASE_URL)
+
+# Connection Pool Configuration (applies to each engine, in each worker process):
+# - DB_POOL_SIZE (int): Connections kept open in the pool.
+# - DB_MAX_OVERFLOW (int): Extra connections allowed above DB_POOL_SIZE during spikes.
+# - DB_POOL_TIMEOUT (int): Seconds to wait for a free connection before raising.
+# - DB_POOL_RECYCLE (int): Seconds after which a connection is replaced, -1 to disable.
+# - DB_POOL_PRE_PING (str): 'True' to test connections on checkout.
+# - DB_POOL_USE_LIFO (str): 'True' to reuse the most recent connection so idle ones can expire.
+# - DB_STATEMENT_TIMEOUT (int): Server side statement timeout in milliseconds, 0 to disable.
+# - DB_POOL_STATUS_ENDPOINT (str): 'True' to serve pool statistics to superadmins at
+#   /health/database. Off by default; the route does not exist unless enabled.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "True").lower() == "true"
+DB_POOL_USE_LIFO = os.environ.get("DB_POOL_USE_LIFO", "False").lower() == "true"
+DB_STATEMENT_TIMEOUT = int(os.environ.get("DB_STATEMENT_TIMEOUT", 0))
+DB_POOL_STATUS_ENDPOINT = os.environ.get("DB_POOL_STATUS_ENDPOINT", "False").lower() == "true"
+
+# Pagination Configuration:
+# - PAGINATION_COUNT_LIMIT (int): Rows the 'auto' count mode counts exactly before
+#   switching to an estimate.
+# - COUNT_CACHE_TTL (int): Seconds an estimated count is reused on backends without
+#   planner statistics.
+PAGINATION_COUNT_LIMIT = int(os.environ.get("PAGINATION_COUNT_LIMIT", 1000))
+COUNT_CACHE_TTL = int(os.environ.get("COUNT_CACHE_TTL", 60))
+# - EXPORT_CHUNK_SIZE (int): Rows fetched per server side cursor batch by streaming exports.
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 1000))
+# - IN_BULK_CHUNK_SIZE (int): Ids bound per IN (...) list by in_bulk lookups.
+IN_BULK_CHUNK_SIZE = int(os.environ.get("IN_BULK_CHUNK_SIZE", 500))
+
+# Search Configuration:
+# - SEARCH_BACKEND (str): Default backend for search_kwargs, one of 'contains',
+#   'trigram', 'tsvector' or 'fts5'. A model can override it with a
+#   ``search_backend`` class attribute.
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "contains")
+if SEARCH_BACKEND not in SEARCH_BACKENDS:
+    raise ValueError(f"SEARCH_BACKEND must be one of {sorted(SEARCH_BACKENDS)}, not {SEARCH_BACKEND!r}")
+
+# Compression Configuration:
+# - COMPRESSION_MINIMUM_SIZE (int): Bodies smaller than this many bytes are sent uncompressed.
+# - COMPRESSION_LEVEL (int): gzip level, 1 (fastest) to 9 (smallest).
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get("COMPRESSION_MINIMUM_SIZE", 500))
+COMPRESSION_LEVEL = int(os.environ.get("COMPRESSION_LEVEL", 6))
+
 APP_ENV = os.environ.get('APP_ENV', 'DEV')
 
 if APP_ENV.lower() in ['production', 'prod']:
@@ -62,6 +135,29 @@ REFRESH_TOKEN_EXPIRE_DAYS = os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS")
 # - FROM_EMAIL (str): The default sender email address.
 SENDGRID_API_KEY = os.environ.get("SENDGRID_API_KEY")
 FROM_EMAIL = os.environ.get("FROM_EMAIL")
+# - EMAIL_TRANSPORT (str): 'sendgrid', 'file' (one .eml per message in EMAIL_FILE_PATH) or 'memory'.
+# - EMAIL_WORKERS (int): Outbox worker tasks, EMAIL_BATCH_SIZE rows are claimed per batch.
+# - EMAIL_POLL_INTERVAL (float): Seconds an idle worker waits before looking for due rows again.
+# - EMAIL_MAX_ATTEMPTS (int): Deliveries tried before a message is marked failed, retried
+#   after EMAIL_RETRY_BASE_DELAY * 2 ** (attempt - 1) seconds, capped at EMAIL_RETRY_MAX_DELAY.
+# - EMAIL_SENDING_TIMEOUT (int): Seconds after which a claimed but unfinished message is
+#   claimed again, e.g. when its worker died.
+# - EMAIL_STOP_TIMEOUT (float): Seconds shutdown waits for in-flight batches before cancelling them.
+EMAIL_TRANSPORT = os.environ.get("EMAIL_TRANSPORT", "sendgrid")
+EMAIL_FILE_PATH = os.environ.get("EMAIL_FILE_PATH", os.path.join(BASE_DIR, "sent_emails"))
+EMAIL_WORKERS = int(os.environ.get("EMAIL_WORKERS", 2))
+EMAIL_BATCH_SIZE = int(os.environ.get("EMAIL_BATCH_SIZE", 50))
+EMAIL_POLL_INTERVAL = float(os.environ.get("EMAIL_POLL_INTERVAL", 5))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get("EMAIL_MAX_ATTEMPTS", 5))
+EMAIL_RETRY_BASE_DELAY = int(os.environ.get("EMAIL_RETRY_BASE_DELAY", 30))
+EMAIL_RETRY_MAX_DELAY = int(os.environ.get("EMAIL_RETRY_MAX_DELAY", 3600))
+EMAIL_SENDING_TIMEOUT = int(os.environ.get("EMAIL_SENDING_TIMEOUT", 300))
+EMAIL_STOP_TIMEOUT = float(os.environ.get("EMAIL_STOP_TIMEOUT", 10))
+# - TEMPLATE_CACHE_SIZE (int): Compiled email templates kept in memory (LRU).
+# - TEMPLATE_BYTECODE_CACHE_DIR (str): Optional directory where compiled templates are
+#   shared between worker processes and restarts.
+TEMPLATE_CACHE_SIZE = int(os.environ.get("TEMPLATE_CACHE_SIZE", 400))
+TEMPLATE_BYTECODE_CACHE_DIR = os.environ.get("TEMPLATE_BYTECODE_CACHE_DIR")
 
 
 #               Admin User Configuration:
@@ -81,6 +177,23 @@ LAST_NAME = os.environ.get("LAST_NAME")
 # - LOGGING_PATH (str): The path for logging.
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, MEDIA_URL)
+# - MAX_FILE_SIZE (int): Largest upload in bytes, enforced while the upload streams to disk.
+# - UPLOAD_CHUNK_SIZE (int): Bytes read and written per step when saving an upload.
+MAX_FILE_SIZE = int(os.environ.get("MAX_FILE_SIZE", 5 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", 64 * 1024))
+# - STORAGE_GC_GRACE (int): Seconds an unreferenced stored file is kept before garbage
+#   collection deletes it, so content released and uploaded again soon is not rewritten.
+STORAGE_GC_GRACE = int(os.environ.get("STORAGE_GC_GRACE", 3600))
+# - IMAGE_WORKERS (int): Processes resizing images for derivatives.
+# - IMAGE_DERIVATIVE_WIDTHS (str): Comma separated widths a derivative may be requested at.
+# - IMAGE_DERIVATIVE_QUALITY (int): Encoder quality for lossy derivative formats.
+# - MEDIA_CACHE_MAX_AGE (int): Cache-Control max-age for content-addressed media, which never changes.
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", 2))
+IMAGE_DERIVATIVE_WIDTHS = tuple(
+    int(width) for width in os.environ.get("IMAGE_DERIVATIVE_WIDTHS", "160,320,640,1280").split(",")
+)
+IMAGE_DERIVATIVE_QUALITY = int(os.environ.get("IMAGE_DERIVATIVE_QUALITY", 80))
+MEDIA_CACHE_MAX_AGE = int(os.environ.get("MEDIA_CACHE_MAX_AGE", 31536000))
 LOGGING_PATH = os.environ.get("LOGGING_PATH")
 
 
@@ -109,9 +222,58 @@ PRODUCTION_ALLOWED_HOST = [""]
 PRODUCTION_ORIGINS = [""]
 
 
-engine = create_engine(DATABASE_URL)
+def get_engine_options(url, is_async=False) -> dict:
+    backend = make_url(url).get_backend_name()
+    options = {
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    # SQLite picks its own pool class and does not accept sizing arguments
+    if backend == "sqlite":
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_use_lifo=DB_POOL_USE_LIFO,
+    )
+
+    if DB_STATEMENT_TIMEOUT and backend == "postgresql":
+        if is_async:
+            options["connect_args"] = {
+                "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT)}
+            }
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT}"}
+
+    return options
+
+
+def create_db_engine(url=DATABASE_URL, **kwargs):
+    return create_engine(url, **{**get_engine_options(url), **kwargs})
+
+
+def create_async_db_engine(url=ASYNC_DATABASE_URL, **kwargs):
+    return create_async_engine(url, **{**get_engine_options(url, is_async=True), **kwargs})
+
+
+def get_pool_status() -> dict:
+    return {
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine),
+    }
+
+
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_db_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 PRODUCTION = False
 DEBUG = False
 TEST = False
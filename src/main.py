@@ -1,18 +1,27 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_sqlalchemy import DBSessionMiddleware
 from fastapi.exceptions import RequestValidationError
-from starlette.middleware.authentication import AuthenticationMiddleware
 
-from src.config import ALLOWED_ORIGINS, ALLOWED_METHODS, ALLOWED_HOST
+from src.config import (
+    ALLOWED_ORIGINS, ALLOWED_METHODS, ALLOWED_HOST, MEDIA_ROOT, MEDIA_URL, DB_POOL_STATUS_ENDPOINT, engine,
+    get_pool_status,
+)
 from .authentication.auth import JWTAuthBackend
 from .management.base import Base
-from .management.settings import DATABASE_URL, DEBUG
+from .management.outbox import outbox_worker
+from .management.sendgrid import precompile_templates
+from .management.settings import DEBUG
 from .middlewares.authentications import AuthExceptionMiddleware
 from .middlewares.base import BaseUrlMiddleware
+from .middlewares.compression import CompressionMiddleware
+from .middlewares.database import DBSessionMiddleware
 from .utils.exception_handlers import exception_handler_base
 from .utils.exception_classes import ObjectDoesNotExist
 from .utils.response_classes import CJSONResponse
+from .utils.derivatives import DERIVATIVE_FORMATS, derivatives
+from .utils.static_files import IMMUTABLE_CACHE_CONTROL, PrecompressedStaticFiles
+from .utils.storage_backend import storage
 
 app = FastAPI(
     debug=DEBUG,
@@ -25,10 +34,43 @@ app.add_middleware(
     allow_methods=ALLOWED_METHODS,
     allow_headers=ALLOWED_HOST,
 )
-app.add_middleware(DBSessionMiddleware, db_url=DATABASE_URL)
-app.add_middleware(AuthenticationMiddleware, backend=JWTAuthBackend())
-app.add_middleware(AuthExceptionMiddleware)
+app.add_middleware(AuthExceptionMiddleware, backend=JWTAuthBackend())
 app.add_middleware(BaseUrlMiddleware)
+# added last so it is outermost: authentication shares the request's session scope
+app.add_middleware(DBSessionMiddleware)
+app.add_middleware(CompressionMiddleware)
+
+app.add_event_handler("startup", outbox_worker.start)
+app.add_event_handler("startup", precompile_templates)
+app.add_event_handler("shutdown", outbox_worker.stop)
+app.add_event_handler("shutdown", derivatives.shutdown)
+
+app.mount(
+    f"/{MEDIA_URL.strip('/')}",
+    PrecompressedStaticFiles(directory=MEDIA_ROOT, check_dir=False),
+    name="media",
+)
+
+
+@app.get("/images/{key:path}", include_in_schema=False)
+async def image_derivative(key: str, width: int, format: str = "webp"):
+    derivative = await derivatives.get(key, width, format)
+    return FileResponse(
+        storage.backend.path(derivative),
+        media_type=DERIVATIVE_FORMATS[format][2],
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL},
+    )
+
+
+async def database_pool_status(request: Request):
+    # pool sizes and checkouts are operational internals, for superadmins only
+    if not getattr(request.user, "is_superadmin", False):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission Denied")
+    return get_pool_status()
+
+
+if DB_POOL_STATUS_ENDPOINT:
+    app.add_api_route("/health/database", database_pool_status, methods=["GET"], include_in_schema=False)
 
 
 @app.exception_handler(RequestValidationError)
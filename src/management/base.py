@@ -9,7 +9,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql.functions import now
 
 from src.management.database.manager import BaseManager, ValidManager, DeletedManager
-from utils.exception_classes import ObjectDoesNotExist
+from src.utils.exception_classes import ObjectDoesNotExist
 
 Base = declarative_base()
 
@@ -58,9 +58,15 @@ class BaseModel(Base):
     def save(self, action='updated', actor_id=None):
         return self.objects.save(self)
 
+    async def asave(self, action='updated', actor_id=None):
+        return await self.objects.asave(self)
+
     def delete(self):
         return self.objects.delete(id=self.id)
 
+    async def adelete(self):
+        return await self.objects.adelete(id=self.id)
+
     @property
     def get_created_at(self):
         return str(self.created)
@@ -1,24 +1,98 @@
 import datetime
+import json
+from functools import lru_cache
+
+from sqlalchemy import DateTime, UniqueConstraint, and_, desc, func, inspect, literal, or_, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, NoResultFound, MultipleResultsFound, CompileError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query, load_only
+from sqlalchemy.sql.functions import GenericFunction
+
+from src.config import (
+    PAGINATION_COUNT_LIMIT, COUNT_CACHE_TTL, EXPORT_CHUNK_SIZE, IN_BULK_CHUNK_SIZE, SEARCH_BACKEND
+)
+from src.utils.cache import TTLCache
+from src.utils.exception_classes import ObjectDoesNotExist, MultipleObjectsReturned
+from src.management.database.session import get_session, get_async_session
+from src.management.database.search import get_search_backend
 
-from sqlalchemy import desc, or_
-from sqlalchemy.exc import IntegrityError, NoResultFound, MultipleResultsFound
+COUNT_EXACT = "exact"
+COUNT_ESTIMATED = "estimated"
+COUNT_NONE = "none"
+COUNT_AUTO = "auto"
+
+# exact counts reused as estimates on backends without planner statistics
+count_cache = TTLCache(maxsize=1024, ttl=COUNT_CACHE_TTL)
+
+
+@lru_cache(maxsize=None)
+def schema_columns(model, schema):
+    """
+    The column attributes of ``model`` that back every field of ``schema``, or None
+    when a field is not a plain column (relationship, property) and the full row
+    is needed to build it.
+    """
+    column_keys = {attr.key for attr in inspect(model).column_attrs}
+    columns = []
+    for name, field in schema.model_fields.items():
+        key = field.validation_alias if isinstance(field.validation_alias, str) else field.alias or name
+        if key not in column_keys:
+            return None
+        columns.append(getattr(model, key))
+    return tuple(columns)
+
+
+class sortable_time(GenericFunction):
+    """
+    A timestamp as an expression that orders and compares by time. SQLite keeps
+    timestamps as text, and server defaults (``'2024-01-01 10:00:00'``) and bound
+    datetimes (``'2024-01-01 10:00:00.000000'``) don't compare equal as text.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(sortable_time)
+def compile_sortable_time(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
 
-from src.utils.exception_classes import ObjectDoesNotExist, MultipleObjectsReturned
-from src.config import SessionLocal
+
+@compiles(sortable_time, "sqlite")
+def compile_sortable_time_sqlite(element, compiler, **kw):
+    return f"julianday({compiler.process(element.clauses, **kw)})"
 
 
 class BaseManager:
-    __session = None
+    # model -> callbacks run with (model, instance) after rows are written through a manager
+    _change_listeners = {}
 
     def __init__(self, model):
         self.model = model
 
+    @classmethod
+    def add_change_listener(cls, model, callback):
+        BaseManager._change_listeners.setdefault(model, []).append(callback)
+
+    @classmethod
+    def remove_change_listener(cls, model, callback):
+        listeners = BaseManager._change_listeners.get(model, [])
+        if callback in listeners:
+            listeners.remove(callback)
+
+    def notify_change(self, instance=None):
+        """Tell listeners that ``instance``, or an unknown set of rows when None, changed."""
+        # a copy, so a listener may remove itself
+        for callback in tuple(BaseManager._change_listeners.get(self.model, ())):
+            callback(self.model, instance)
+
     @staticmethod
     def db():
-        if BaseManager.__session is None or not BaseManager.__session.is_active:
-            BaseManager.__session = SessionLocal()
+        return get_session()
 
-        return BaseManager.__session
+    @staticmethod
+    def adb():
+        return get_async_session()
 
     def persist_db(self, query=None):
         self.db.close()
@@ -28,35 +102,78 @@ class BaseManager:
     def rollback(cls):
         cls.db().rollback()
 
+    @classmethod
+    async def arollback(cls):
+        await cls.adb().rollback()
+
     def save(self, model_object):
         session = self.__class__.db()
         try:
             session.add(model_object)
             session.commit()
             session.refresh(model_object)
+            self.notify_change(model_object)
             return model_object
         except (IntegrityError, Exception) as e:
             session.rollback()
             raise e
 
+    async def asave(self, model_object):
+        session = self.__class__.adb()
+        try:
+            session.add(model_object)
+            await session.commit()
+            await session.refresh(model_object)
+            self.notify_change(model_object)
+            return model_object
+        except (IntegrityError, Exception) as e:
+            await session.rollback()
+            raise e
+
     def query(self):
         return self.__class__.db().query(self.model)
 
-    def get_searchset(self, search_kwargs: dict):
-        return [
-                getattr(self.model, key).icontains(value, autoescape=True) for key, value in search_kwargs.items()
-            ]
+    def statement(self):
+        return select(self.model)
 
-    def filter_by(self, **kwargs):
-        return self.query().filter_by(**kwargs).order_by(desc(self.model.created))
+    @property
+    def search_backend(self):
+        return get_search_backend(getattr(self.model, "search_backend", SEARCH_BACKEND))
 
-    def filter_query(self, search_kwargs: dict = None, **kwargs):
+    def get_searchset(self, search_kwargs: dict):
+        return self.search_backend.clauses(self.model, search_kwargs)
+
+    def get_search_rank(self, search_kwargs: dict):
+        return self.search_backend.rank(self.model, search_kwargs)
+
+    def project(self, query, out_schema=None):
+        """
+        Load only the columns ``out_schema`` reads (plus the primary key and
+        ``created``, which pagination needs) when all of its fields are columns.
+        """
+        columns = schema_columns(self.model, out_schema) if out_schema is not None else None
+        if not columns:
+            return query
+        return query.options(load_only(self.model.created, *columns))
+
+    def apply_filters(self, query, search_kwargs: dict = None, **kwargs):
+        """
+        Apply the filter, search and date range rules to either a legacy Query or a
+        2.0 style Select, so the sync and async APIs share the same semantics.
+        ``out_schema`` restricts the loaded columns to those the schema needs and
+        ``search_rank`` orders search matches by relevance before recency.
+        """
         date_from = kwargs.pop('date_from', None)
         date_to = kwargs.pop('date_to', None)
-        query = self.query().filter_by(**kwargs).order_by(desc(self.model.created))
+        search_rank = kwargs.pop('search_rank', False)
+        query = self.project(query, kwargs.pop('out_schema', None))
+        query = query.filter_by(**kwargs).order_by(desc(self.model.created))
         if search_kwargs:
-            search_query = self.get_searchset(search_kwargs)
-            query = query.filter(or_(*search_query))
+            query = query.filter(or_(*self.get_searchset(search_kwargs)))
+            rank = self.get_search_rank(search_kwargs) if search_rank else None
+            if rank is not None:
+                # scored after the indexed match, so only matching rows are ranked
+                query = query.order_by(None).order_by(desc(rank), desc(self.model.created))
 
         if date_from and date_to:
             if not isinstance(date_to, datetime.datetime):
@@ -68,35 +185,339 @@ class BaseManager:
 
         return query
 
+    def keyset_filter(self, query, position: tuple = None, reverse: bool = False):
+        """
+        Order a Query or Select by (created, id) newest first and keep only the rows
+        after ``position``, or before it when ``reverse`` is set. The page is read
+        from the ``created`` index instead of scanning past an OFFSET.
+        """
+        # the cursor value is bound with the column's type, so it is stored the way the column is
+        created, pk = sortable_time(self.model.created), self.model.id
+        if reverse:
+            query = query.order_by(None).order_by(created.asc(), pk.asc())
+        else:
+            query = query.order_by(None).order_by(created.desc(), pk.desc())
+
+        if position is None:
+            return query
+
+        position_created, position_pk = position
+        position_created = sortable_time(literal(position_created, type_=self.model.created.type))
+        if reverse:
+            seek = or_(created > position_created, and_(created == position_created, pk > position_pk))
+        else:
+            seek = or_(created < position_created, and_(created == position_created, pk < position_pk))
+        return query.filter(seek)
+
+    def filter_by(self, **kwargs):
+        return self.query().filter_by(**kwargs).order_by(desc(self.model.created))
+
+    def select_by(self, **kwargs):
+        return self.statement().filter_by(**kwargs).order_by(desc(self.model.created))
+
+    def filter_query(self, search_kwargs: dict = None, **kwargs):
+        return self.apply_filters(self.query(), search_kwargs=search_kwargs, **kwargs)
+
+    def select_query(self, search_kwargs: dict = None, **kwargs):
+        return self.apply_filters(self.statement(), search_kwargs=search_kwargs, **kwargs)
+
+    async def ascalars(self, statement):
+        result = await self.__class__.adb().scalars(statement)
+        return result.all()
+
+    def stream_partitions(self, query, chunk_size: int = EXPORT_CHUNK_SIZE):
+        """
+        Iterate ``query`` through a server side cursor, yielding lists of at most
+        ``chunk_size`` rows, so memory stays flat however many rows match.
+        """
+        statement = query.statement if isinstance(query, Query) else query
+        result = self.__class__.db().execute(statement.execution_options(yield_per=chunk_size))
+        yield from result.scalars().partitions()
+
+    async def astream_partitions(self, statement, chunk_size: int = EXPORT_CHUNK_SIZE):
+        result = await self.__class__.adb().stream_scalars(
+            statement.execution_options(yield_per=chunk_size)
+        )
+        async for partition in result.partitions():
+            yield partition
+
     def filter(self, **kwargs):
         return self.filter_by(**kwargs).all()
 
+    async def afilter(self, **kwargs):
+        return await self.ascalars(self.select_by(**kwargs))
+
+    def exists_statement(self, **kwargs):
+        # SELECT EXISTS (SELECT ... LIMIT 1) stops at the first match and loads no rows
+        return select(self.statement().filter_by(**kwargs).limit(1).exists())
+
     def filter_exists(self, **kwargs):
-        return bool(self.filter_by(**kwargs).all())
+        return bool(self.__class__.db().scalar(self.exists_statement(**kwargs)))
+
+    async def afilter_exists(self, **kwargs):
+        return bool(await self.__class__.adb().scalar(self.exists_statement(**kwargs)))
 
     def create(self, **data):
         model_object = self.model(**data)
         return self.save(model_object)
 
+    async def acreate(self, **data):
+        model_object = self.model(**data)
+        return await self.asave(model_object)
+
     def bulk_create(self, objs):
         session = self.__class__.db()
         try:
             session.bulk_save_objects(objs)
             session.commit()
-            return
         except Exception as e:
             session.rollback()
             raise e
+        self.notify_change()
+
+    async def abulk_create(self, objs):
+        session = self.__class__.adb()
+        try:
+            await session.run_sync(lambda sync_session: sync_session.bulk_save_objects(objs))
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            raise e
+        self.notify_change()
+
+    def returning_columns(self, returning):
+        return [getattr(self.model, column) if isinstance(column, str) else column for column in returning]
+
+    def execute_write(self, statement, returning: list = None):
+        """Run a single set based write, returning the RETURNING rows or the affected row count."""
+        session = self.__class__.db()
+        try:
+            result = session.execute(statement)
+            affected = result.all() if returning else result.rowcount
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            raise e
+
+        self.notify_change()
+        return affected
+
+    async def aexecute_write(self, statement, returning: list = None):
+        session = self.__class__.adb()
+        try:
+            result = await session.execute(statement)
+            affected = result.all() if returning else result.rowcount
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            raise e
+
+        self.notify_change()
+        return affected
+
+    def update_statement(self, values: dict, returning: list = None, **filters):
+        # rows already loaded in the session are not synchronised, they refresh on their next load
+        statement = (
+            update(self.model)
+            .filter_by(**filters)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if returning:
+            statement = statement.returning(*self.returning_columns(returning))
+        return statement
+
+    def upsert_statement(
+            self, dialect_name: str, rows: list, conflict_keys: list, update_fields: list = None, returning: list = None,
+            update_values: dict = None
+    ):
+        """
+        A multi row INSERT that updates ``update_fields`` (by default every non key
+        field) of rows that collide on ``conflict_keys``, using the dialect's
+        ON CONFLICT / ON DUPLICATE KEY clause. ``update_values`` sets further
+        fields of the existing row to expressions, e.g. ``{"hits": Model.hits + 1}``.
+        """
+        if update_fields is None:
+            update_fields = [key for key in rows[0] if key not in conflict_keys]
+        update_values = update_values or {}
+
+        if dialect_name in ("postgresql", "sqlite"):
+            dialect = postgresql if dialect_name == "postgresql" else sqlite
+            statement = dialect.insert(self.model).values(rows)
+            set_ = {field: statement.excluded[field] for field in update_fields}
+            set_.update(update_values)
+            if set_:
+                # onupdate defaults do not fire for the DO UPDATE branch
+                set_.setdefault("updated", func.now())
+                statement = statement.on_conflict_do_update(index_elements=conflict_keys, set_=set_)
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=conflict_keys)
+
+        elif dialect_name in ("mysql", "mariadb"):
+            statement = mysql.insert(self.model).values(rows)
+            # with nothing to update, the key is assigned to itself, as there is no DO NOTHING
+            set_ = {field: statement.inserted[field] for field in update_fields or conflict_keys}
+            if update_fields or update_values:
+                set_.update(update_values)
+                set_.setdefault("updated", func.now())
+            statement = statement.on_duplicate_key_update(set_)
+
+        else:
+            raise NotImplementedError(f"bulk_upsert is not supported on {dialect_name}")
+
+        if returning:
+            statement = statement.returning(*self.returning_columns(returning))
+        return statement
+
+    def bulk_update(self, values: dict, returning: list = None, **filters):
+        """UPDATE every row matching ``filters`` with ``values`` in a single statement."""
+        return self.execute_write(self.update_statement(values, returning, **filters), returning)
+
+    async def abulk_update(self, values: dict, returning: list = None, **filters):
+        return await self.aexecute_write(self.update_statement(values, returning, **filters), returning)
+
+    def bulk_upsert(
+            self, rows: list, conflict_keys: list, update_fields: list = None, returning: list = None,
+            update_values: dict = None
+    ):
+        if not rows:
+            return [] if returning else 0
+        dialect_name = self.__class__.db().get_bind().dialect.name
+        statement = self.upsert_statement(dialect_name, rows, conflict_keys, update_fields, returning, update_values)
+        return self.execute_write(statement, returning)
+
+    async def abulk_upsert(
+            self, rows: list, conflict_keys: list, update_fields: list = None, returning: list = None,
+            update_values: dict = None
+    ):
+        if not rows:
+            return [] if returning else 0
+        dialect_name = self.__class__.adb().get_bind().dialect.name
+        statement = self.upsert_statement(dialect_name, rows, conflict_keys, update_fields, returning, update_values)
+        return await self.aexecute_write(statement, returning)
+
+    def bulk_soft_delete(self, returning: list = None, **filters):
+        """Flag every live row matching ``filters`` as deleted in a single statement."""
+        filters['is_deleted'] = False
+        return self.bulk_update({"is_deleted": True}, returning, **filters)
+
+    async def abulk_soft_delete(self, returning: list = None, **filters):
+        filters['is_deleted'] = False
+        return await self.abulk_update({"is_deleted": True}, returning, **filters)
 
     def all(self):
         return self.filter_query().all()
 
+    async def aall(self):
+        return await self.ascalars(self.select_query())
+
     def count(self):
         return self.filter_query().count()
 
+    async def acount(self, statement=None):
+        if statement is None:
+            statement = self.select_query()
+        return await self.__class__.adb().scalar(self.count_statement(statement))
+
+    @staticmethod
+    def count_statement(statement, limit: int = None):
+        statement = statement.order_by(None)
+        if limit is not None:
+            statement = statement.limit(limit)
+        return select(func.count()).select_from(statement.subquery())
+
+    def last_modified_statement(self, statement):
+        # aggregates over the same FROM / WHERE, without the entity columns or loader options
+        statement = statement.statement if isinstance(statement, Query) else statement
+        return statement.order_by(None).with_only_columns(func.max(self.model.updated), func.count())
+
+    def last_modified(self, statement) -> tuple:
+        """The newest ``updated`` and the row count of ``statement``, which change with any write to it."""
+        return tuple(self.__class__.db().execute(self.last_modified_statement(statement)).one())
+
+    async def alast_modified(self, statement) -> tuple:
+        return tuple((await self.__class__.adb().execute(self.last_modified_statement(statement))).one())
+
+    def estimate_rows(self, session, statement):
+        """
+        Row estimate for ``statement``: the planner's guess on Postgres, otherwise an
+        exact count that is cached for COUNT_CACHE_TTL seconds.
+        """
+        statement = statement.order_by(None)
+        dialect = session.get_bind().dialect
+        if dialect.name == "postgresql":
+            try:
+                # a named paramstyle keeps literal '%' undoubled for a parameterless execute
+                sql = statement.compile(
+                    dialect=postgresql.dialect(paramstyle="named"),
+                    compile_kwargs={"literal_binds": True},
+                )
+            except (CompileError, NotImplementedError):
+                sql = None
+            if sql is not None:
+                plan = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]["Plan"]["Plan Rows"])
+
+        compiled = statement.compile(dialect=dialect)
+        key = (str(compiled), repr(sorted(compiled.params.items())))
+        count = count_cache.get(key)
+        if count is None:
+            count = session.scalar(self.count_statement(statement))
+            count_cache.set(key, count)
+        return count
+
+    def count_rows(self, session, statement, mode: str = COUNT_EXACT, limit: int = PAGINATION_COUNT_LIMIT):
+        """
+        Count ``statement`` according to ``mode`` and return ``(count, mode_used)``.
+        'auto' counts exactly up to ``limit`` rows and estimates beyond that, so a
+        wide search or date range never turns into a full COUNT(*).
+        """
+        if mode == COUNT_NONE:
+            return None, COUNT_NONE
+
+        if mode == COUNT_ESTIMATED:
+            return self.estimate_rows(session, statement), COUNT_ESTIMATED
+
+        if mode == COUNT_AUTO:
+            count = session.scalar(self.count_statement(statement, limit=limit + 1))
+            if count <= limit:
+                return count, COUNT_EXACT
+            return max(self.estimate_rows(session, statement), count), COUNT_ESTIMATED
+
+        return session.scalar(self.count_statement(statement)), COUNT_EXACT
+
+    def page_count(self, query, mode: str = COUNT_EXACT, limit: int = PAGINATION_COUNT_LIMIT):
+        statement = query.statement if isinstance(query, Query) else query
+        return self.count_rows(self.__class__.db(), statement, mode=mode, limit=limit)
+
+    async def apage_count(self, statement, mode: str = COUNT_EXACT, limit: int = PAGINATION_COUNT_LIMIT):
+        return await self.__class__.adb().run_sync(self.count_rows, statement, mode, limit)
+
+    def primary_key_lookup(self, kwargs: dict):
+        """The primary key value when ``kwargs`` filter on the primary key alone, else None."""
+        primary_key = inspect(self.model).primary_key
+        if len(kwargs) == 1 and len(primary_key) == 1 and primary_key[0].key in kwargs:
+            return kwargs[primary_key[0].key]
+        return None
+
     def get(self, **kwargs):
+        pk = self.primary_key_lookup(kwargs)
+        if pk is not None:
+            try:
+                # served from the identity map when the row is already loaded
+                obj = self.__class__.db().get(self.model, pk)
+            except Exception as e:
+                self.__class__.db().rollback()
+                raise e
+            if obj is None:
+                raise ObjectDoesNotExist("Object matching query not found")
+            return obj
+
         try:
-            return self.filter_by(**kwargs).one()
+            # no ordering needed to pick a single row, and two rows are enough to tell it is not single
+            return self.query().filter_by(**kwargs).limit(2).one()
         except MultipleResultsFound as e:
             self.__class__.db().rollback()
             raise MultipleObjectsReturned(str(e))
@@ -109,12 +530,172 @@ class BaseManager:
             self.__class__.db().rollback()
             raise e
 
+    async def aget(self, **kwargs):
+        pk = self.primary_key_lookup(kwargs)
+        if pk is not None:
+            try:
+                obj = await self.__class__.adb().get(self.model, pk)
+            except Exception as e:
+                await self.__class__.arollback()
+                raise e
+            if obj is None:
+                raise ObjectDoesNotExist("Object matching query not found")
+            return obj
+
+        try:
+            result = await self.__class__.adb().scalars(self.statement().filter_by(**kwargs).limit(2))
+            return result.one()
+        except MultipleResultsFound as e:
+            await self.__class__.arollback()
+            raise MultipleObjectsReturned(str(e))
+
+        except NoResultFound as e:
+            await self.__class__.arollback()
+            raise ObjectDoesNotExist("Object matching query not found")
+
+        except Exception as e:
+            await self.__class__.arollback()
+            raise e
+
+    def unique_key(self, fields) -> list | None:
+        """The primary key or unique constraint made of exactly ``fields``, as column names."""
+        table = self.model.__table__
+        keys = [table.primary_key.columns]
+        keys += [constraint.columns for constraint in table.constraints if isinstance(constraint, UniqueConstraint)]
+        keys += [index.columns for index in table.indexes if index.unique]
+        keys += [[column] for column in table.columns if column.unique]
+        for columns in keys:
+            names = [column.name for column in columns]
+            if names and set(names) == set(fields):
+                return names
+        return None
+
+    def insert_ignore_statement(self, dialect_name: str, data: dict, conflict_keys: list):
+        """
+        INSERT ... ON CONFLICT (conflict_keys) DO NOTHING RETURNING the new row, or
+        None where the dialect has no such clause. No row comes back when the
+        insert collided on ``conflict_keys``; a clash on any other unique
+        constraint still raises.
+        """
+        if dialect_name not in ("postgresql", "sqlite") or not conflict_keys:
+            return None
+        dialect = postgresql if dialect_name == "postgresql" else sqlite
+        return (
+            dialect.insert(self.model)
+            .values(**data)
+            .on_conflict_do_nothing(index_elements=conflict_keys)
+            .returning(self.model)
+        )
+
     def get_or_create(self, defaults: dict = {}, **kwargs):
         try:
             return self.get(**kwargs), False
         except ObjectDoesNotExist:
-            data = {**kwargs, **defaults}
-            return self.create(**data), True
+            pass
+
+        # a concurrent request may insert the same row between the get and the insert,
+        # in which case the conflicting insert is dropped and the winner's row is read back
+        session = self.__class__.db()
+        data = {**kwargs, **defaults}
+        statement = self.insert_ignore_statement(session.get_bind().dialect.name, data, self.unique_key(kwargs))
+        try:
+            if statement is None:
+                return self.create(**data), True
+
+            obj = session.scalars(statement).one_or_none()
+            session.commit()
+        except IntegrityError as e:
+            session.rollback()
+            try:
+                return self.get(**kwargs), False
+            except ObjectDoesNotExist:
+                # the conflict was on another unique field, not a row matching kwargs
+                raise e
+        except Exception as e:
+            session.rollback()
+            raise e
+
+        if obj is None:
+            try:
+                return self.get(**kwargs), False
+            except ObjectDoesNotExist:
+                # the row it collided with is gone again; a plain insert either wins or raises the conflict
+                return self.create(**data), True
+        self.notify_change(obj)
+        return obj, True
+
+    async def aget_or_create(self, defaults: dict = {}, **kwargs):
+        try:
+            return await self.aget(**kwargs), False
+        except ObjectDoesNotExist:
+            pass
+
+        session = self.__class__.adb()
+        data = {**kwargs, **defaults}
+        statement = self.insert_ignore_statement(session.get_bind().dialect.name, data, self.unique_key(kwargs))
+        try:
+            if statement is None:
+                return await self.acreate(**data), True
+
+            obj = (await session.scalars(statement)).one_or_none()
+            await session.commit()
+        except IntegrityError as e:
+            await session.rollback()
+            try:
+                return await self.aget(**kwargs), False
+            except ObjectDoesNotExist:
+                raise e
+        except Exception as e:
+            await session.rollback()
+            raise e
+
+        if obj is None:
+            try:
+                return await self.aget(**kwargs), False
+            except ObjectDoesNotExist:
+                return await self.acreate(**data), True
+        self.notify_change(obj)
+        return obj, True
+
+    def in_bulk_statements(self, ids, field: str = "id", chunk_size: int = IN_BULK_CHUNK_SIZE):
+        # chunked so very long id lists stay under the backend's bound parameter limit
+        column = getattr(self.model, field)
+        ids = list(dict.fromkeys(ids))
+        for start in range(0, len(ids), chunk_size):
+            yield self.statement().where(column.in_(ids[start:start + chunk_size]))
+
+    def in_bulk(self, ids, field: str = "id", chunk_size: int = IN_BULK_CHUNK_SIZE) -> dict:
+        """
+        Fetch every object whose ``field`` is in ``ids`` with one IN query per
+        chunk, returned as a dict keyed by that field. Missing ids are left out.
+        """
+        session = self.__class__.db()
+        objects = {}
+        try:
+            for statement in self.in_bulk_statements(ids, field, chunk_size):
+                for obj in session.scalars(statement):
+                    objects[getattr(obj, field)] = obj
+        except Exception as e:
+            session.rollback()
+            raise e
+        return objects
+
+    async def ain_bulk(self, ids, field: str = "id", chunk_size: int = IN_BULK_CHUNK_SIZE) -> dict:
+        objects = {}
+        try:
+            for statement in self.in_bulk_statements(ids, field, chunk_size):
+                for obj in await self.ascalars(statement):
+                    objects[getattr(obj, field)] = obj
+        except Exception as e:
+            await self.__class__.arollback()
+            raise e
+        return objects
+
+    def get_many(self, ids, chunk_size: int = IN_BULK_CHUNK_SIZE) -> dict:
+        return self.in_bulk(ids, chunk_size=chunk_size)
+
+    async def aget_many(self, ids, chunk_size: int = IN_BULK_CHUNK_SIZE) -> dict:
+        return await self.ain_bulk(ids, chunk_size=chunk_size)
 
     def get_multi(self, query=None, skip: int = 0, limit: int = 10):
         try:
@@ -126,39 +707,81 @@ class BaseManager:
             self.__class__.db().rollback()
             raise e
 
+    async def aget_multi(self, statement=None, skip: int = 0, limit: int = 10):
+        if statement is None:
+            statement = self.statement()
+        try:
+            return await self.ascalars(statement.offset(skip).limit(limit))
+
+        except Exception as e:
+            await self.__class__.arollback()
+            raise e
+
+    @staticmethod
+    def apply_update(db_object, data: dict):
+        # to update many-to-many relationship
+        if "related_objects" in data:
+            related_object: dict = data.pop("related_objects")
+
+            for relationship_name, related_objects in related_object.items():
+                getattr(db_object, relationship_name).clear()
+                # Update the many-to-many relationship
+                setattr(db_object, relationship_name, related_objects)
+
+        for key, value in data.items():
+            setattr(db_object, key, value)
+
+        return db_object
+
     def update(self, data: dict, actor_id: int = None, **kwargs):
         db_object = self.get(**kwargs)
         if db_object:
-            # to update many-to-many relationship
-            if "related_objects" in data:
-                related_object: dict = data.pop("related_objects")
-
-                for relationship_name, related_objects in related_object.items():
-                    getattr(db_object, relationship_name).clear()
-                    # Update the many-to-many relationship
-                    setattr(db_object, relationship_name, related_objects)
+            self.apply_update(db_object, data)
+            return self.save(db_object)
 
-            for key, value in data.items():
-                setattr(db_object, key, value)
-
-            return self.save(db_object, actor_id=actor_id)
+    async def aupdate(self, data: dict, actor_id: int = None, **kwargs):
+        db_object = await self.aget(**kwargs)
+        if db_object:
+            # relationship collections lazy load, so apply the changes on the sync facade
+            await self.__class__.adb().run_sync(lambda _: self.apply_update(db_object, data))
+            return await self.asave(db_object)
 
     def delete(self, **kwargs):
         db_obj = self.get(**kwargs)
         setattr(db_obj, "is_deleted", True)
         return self.save(db_obj)
 
+    async def adelete(self, **kwargs):
+        db_obj = await self.aget(**kwargs)
+        setattr(db_obj, "is_deleted", True)
+        return await self.asave(db_obj)
+
 
 class ValidManager(BaseManager):
     def filter(self, **kwargs):
         kwargs['is_deleted'] = False
         return super().filter(**kwargs)
 
+    async def afilter(self, **kwargs):
+        kwargs['is_deleted'] = False
+        return await super().afilter(**kwargs)
+
     def filter_query(self, search_kwargs: dict = None, **kwargs):
         kwargs['is_deleted'] = False
         return super().filter_query(search_kwargs=search_kwargs, **kwargs)
 
+    def select_query(self, search_kwargs: dict = None, **kwargs):
+        kwargs['is_deleted'] = False
+        return super().select_query(search_kwargs=search_kwargs, **kwargs)
+
+    def in_bulk_statements(self, ids, field: str = "id", chunk_size: int = IN_BULK_CHUNK_SIZE):
+        for statement in super().in_bulk_statements(ids, field, chunk_size):
+            yield statement.where(self.model.is_deleted.is_(False))
+
 
 class DeletedManager(BaseManager):
     def filter(self, **kwargs):
         return super().filter(is_deleted=True, **kwargs)
+
+    async def afilter(self, **kwargs):
+        return await super().afilter(is_deleted=True, **kwargs)
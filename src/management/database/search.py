@@ -0,0 +1,196 @@
+"""
+Search backends for ``BaseManager.get_searchset``.
+
+Every backend turns ``search_kwargs`` ({column: term}) into one clause per
+column, OR'ed together by the manager, and can optionally rank the matches.
+A model picks a backend with a ``search_backend`` class attribute, otherwise
+``SEARCH_BACKEND`` from the config is used:
+
+- ``contains``: ``ILIKE '%term%'``, works everywhere but cannot use a B-tree index.
+- ``trigram``: the same ILIKE, served by a ``pg_trgm`` GIN index on Postgres.
+- ``tsvector``: Postgres full text search against a GIN expression index.
+- ``fts5``: SQLite full text search through an external content FTS5 table.
+
+The indexes each backend relies on are created by the migration helpers at the
+bottom of this module.
+"""
+from sqlalchemy import func, literal_column, select, table, column, text
+
+
+class SearchBackend:
+    name = None
+
+    def clause(self, model, field: str, term: str):
+        raise NotImplementedError
+
+    def rank(self, model, search_kwargs: dict):
+        """An ORDER BY expression scoring a match, or None when unranked."""
+        return None
+
+    def clauses(self, model, search_kwargs: dict) -> list:
+        return [self.clause(model, field, term) for field, term in search_kwargs.items()]
+
+
+class ContainsSearch(SearchBackend):
+    name = "contains"
+
+    def clause(self, model, field: str, term: str):
+        return getattr(model, field).icontains(term, autoescape=True)
+
+
+class TrigramSearch(ContainsSearch):
+    """
+    Keeps the substring semantics of ``contains``; a ``gin_trgm_ops`` index lets
+    Postgres answer the ILIKE without a sequential scan for terms of three or
+    more characters. Matches are ranked by trigram similarity.
+    """
+    name = "trigram"
+
+    def rank(self, model, search_kwargs: dict):
+        scores = [func.similarity(getattr(model, field), term) for field, term in search_kwargs.items()]
+        return func.greatest(*scores) if len(scores) > 1 else scores[0]
+
+
+class TSVectorSearch(SearchBackend):
+    """
+    Matches whole words (with stemming for language configs) using the same
+    ``to_tsvector(config, coalesce(column, ''))`` expression the GIN index is
+    built on, so the planner can use it.
+    """
+    name = "tsvector"
+
+    def __init__(self, config: str = "simple"):
+        self.config = config
+
+    def document(self, model, field: str):
+        # literals rather than bound parameters, so the expression matches the index
+        # also with drivers that prepare statements server side
+        return func.to_tsvector(
+            literal_column(f"'{self.config}'"), func.coalesce(getattr(model, field), literal_column("''"))
+        )
+
+    def query(self, term: str):
+        return func.websearch_to_tsquery(literal_column(f"'{self.config}'"), term)
+
+    def clause(self, model, field: str, term: str):
+        return self.document(model, field).op("@@")(self.query(term))
+
+    def rank(self, model, search_kwargs: dict):
+        scores = [func.ts_rank(self.document(model, field), self.query(term)) for field, term in search_kwargs.items()]
+        return func.greatest(*scores) if len(scores) > 1 else scores[0]
+
+
+class FTS5Search(SearchBackend):
+    """
+    Looks terms up in ``<table>_fts``, an FTS5 table indexing the searched
+    columns with the model's primary key as its rowid. Each term is matched as
+    a phrase prefix, the closest FTS5 gets to ``contains``.
+    """
+    name = "fts5"
+
+    @staticmethod
+    def fts_table(model):
+        return f"{model.__tablename__}_fts"
+
+    @staticmethod
+    def phrase(term: str) -> str:
+        return '"{}"*'.format(term.replace('"', '""'))
+
+    def matches(self, model, field: str, term: str):
+        fts = table(self.fts_table(model), column("rowid"), column(field))
+        return select(fts.c.rowid).where(fts.c[field].op("MATCH")(self.phrase(term)))
+
+    def clause(self, model, field: str, term: str):
+        return model.id.in_(self.matches(model, field, term))
+
+    def rank(self, model, search_kwargs: dict):
+        # only evaluated for rows the MATCH already selected
+        name = self.fts_table(model)
+        fts = table(name, column("rowid"), *(column(field) for field in search_kwargs))
+        query = " OR ".join(f"{field} : {self.phrase(term)}" for field, term in search_kwargs.items())
+        return (
+            # bm25 is negative, lower meaning more relevant
+            select(literal_column(f"-bm25({name})"))
+            .select_from(fts)
+            .where(fts.c.rowid == model.id, literal_column(name).op("MATCH")(query))
+            .scalar_subquery()
+        )
+
+
+SEARCH_BACKENDS = {
+    backend.name: backend
+    for backend in (ContainsSearch, TrigramSearch, TSVectorSearch, FTS5Search)
+}
+
+
+def get_search_backend(name: str) -> SearchBackend:
+    try:
+        return SEARCH_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown search backend {name!r}, expected one of {sorted(SEARCH_BACKENDS)}")
+
+
+# Alembic helpers, called from a migration's upgrade() / downgrade() with ``op``.
+
+def search_index_name(table_name: str, field: str, backend: str) -> str:
+    return f"ix_{table_name}_{field}_{backend}"
+
+
+def create_search_indexes(op, table_name: str, fields: list, backend: str = "tsvector", config: str = "simple"):
+    if backend == "tsvector":
+        for field in fields:
+            op.create_index(
+                search_index_name(table_name, field, backend),
+                table_name,
+                [text(f"to_tsvector('{config}', coalesce({field}, ''))")],
+                postgresql_using="gin",
+            )
+
+    elif backend == "trigram":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for field in fields:
+            op.create_index(
+                search_index_name(table_name, field, backend),
+                table_name,
+                [text(f"{field} gin_trgm_ops")],
+                postgresql_using="gin",
+            )
+
+    elif backend == "fts5":
+        # an external content table plus triggers keeping it in step with the source table
+        name = f"{table_name}_fts"
+        columns = ", ".join(fields)
+        new_values = ", ".join(f"new.{field}" for field in fields)
+        old_values = ", ".join(f"old.{field}" for field in fields)
+        op.execute(
+            f"CREATE VIRTUAL TABLE {name} USING fts5({columns}, content='{table_name}', content_rowid='id')"
+        )
+        op.execute(
+            f"CREATE TRIGGER {name}_ai AFTER INSERT ON {table_name} BEGIN "
+            f"INSERT INTO {name}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {name}_ad AFTER DELETE ON {table_name} BEGIN "
+            f"INSERT INTO {name}({name}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {name}_au AFTER UPDATE ON {table_name} BEGIN "
+            f"INSERT INTO {name}({name}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {name}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+
+    elif backend != "contains":
+        raise ValueError(f"Unknown search backend {backend!r}")
+
+
+def drop_search_indexes(op, table_name: str, fields: list, backend: str = "tsvector"):
+    if backend in ("tsvector", "trigram"):
+        for field in fields:
+            op.drop_index(search_index_name(table_name, field, backend), table_name=table_name)
+
+    elif backend == "fts5":
+        name = f"{table_name}_fts"
+        for suffix in ("ai", "ad", "au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {name}_{suffix}")
+        op.execute(f"DROP TABLE IF EXISTS {name}")
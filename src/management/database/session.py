@@ -0,0 +1,85 @@
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from src.config import SessionLocal, AsyncSessionLocal
+
+
+class SessionScope:
+    """
+    Holds the sessions used by a single unit of work (usually one request).
+    Sessions are created lazily, so a request that never touches the database
+    never checks a connection out of the pool.
+    """
+
+    def __init__(self):
+        self._session = None
+        self._async_session = None
+
+    @property
+    def session(self):
+        if self._session is None or not self._session.is_active:
+            self.close()
+            self._session = SessionLocal()
+        return self._session
+
+    @property
+    def async_session(self):
+        if self._async_session is None:
+            self._async_session = AsyncSessionLocal()
+        return self._async_session
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    async def aclose(self):
+        self.close()
+        if self._async_session is not None:
+            await self._async_session.close()
+            self._async_session = None
+
+
+_session_scope: ContextVar[SessionScope | None] = ContextVar("session_scope", default=None)
+
+
+def current_scope() -> SessionScope:
+    """
+    Return the scope bound to the running context. Outside a request (scripts,
+    management commands) a scope is bound to the calling context on first use.
+    """
+    scope = _session_scope.get()
+    if scope is None:
+        scope = SessionScope()
+        _session_scope.set(scope)
+    return scope
+
+
+def get_session():
+    return current_scope().session
+
+
+def get_async_session():
+    return current_scope().async_session
+
+
+@contextmanager
+def session_scope():
+    scope = SessionScope()
+    token = _session_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        scope.close()
+        _session_scope.reset(token)
+
+
+@asynccontextmanager
+async def async_session_scope():
+    scope = SessionScope()
+    token = _session_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        await scope.aclose()
+        _session_scope.reset(token)
@@ -0,0 +1,55 @@
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.sql.functions import now
+
+from src.management.base import BaseModel
+
+
+class EmailOutbox(BaseModel):
+    """
+    Emails waiting to be delivered. Requests only insert rows here; the outbox
+    worker claims due rows, sends them and records the outcome.
+    """
+    __tablename__ = "email_outbox"
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    to_email = Column(String(255), nullable=False)
+    from_email = Column(String(255), nullable=True)
+    subject = Column(String(255), nullable=False)
+    content = Column(Text, nullable=False)
+    status = Column(String(16), nullable=False, default=PENDING, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, default=now(), index=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email}"
+
+
+class StoredBlob(BaseModel):
+    """
+    One content-addressed file in media storage and how many records use it.
+    Unreferenced blobs are removed by Storage.collect_garbage.
+    """
+    __tablename__ = "stored_blob"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    key = Column(String(255), unique=True, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=1)
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,333 @@
+import asyncio
+import logging
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+
+import anyio
+import httpx
+from sqlalchemy import or_, select, update
+
+from src.config import (
+    SENDGRID_API_KEY,
+    FROM_EMAIL,
+    EMAIL_TRANSPORT,
+    EMAIL_FILE_PATH,
+    EMAIL_WORKERS,
+    EMAIL_BATCH_SIZE,
+    EMAIL_POLL_INTERVAL,
+    EMAIL_MAX_ATTEMPTS,
+    EMAIL_RETRY_BASE_DELAY,
+    EMAIL_RETRY_MAX_DELAY,
+    EMAIL_SENDING_TIMEOUT,
+    EMAIL_STOP_TIMEOUT,
+)
+from src.management.database.session import async_session_scope
+from src.management.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+class EmailDeliveryError(Exception):
+    """A send that failed. Permanent failures are not retried."""
+
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+class EmailTransport:
+    async def send(self, message: EmailOutbox):
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+
+class SendGridTransport(EmailTransport):
+    """
+    Sends through the SendGrid v3 API on one shared HTTP client, so every
+    worker reuses the same pool of keep-alive connections.
+    """
+    url = "https://api.sendgrid.com/v3/mail/send"
+
+    def __init__(self, api_key: str = SENDGRID_API_KEY, client: httpx.AsyncClient = None):
+        self.api_key = api_key
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            limits=httpx.Limits(max_connections=EMAIL_WORKERS * 10, max_keepalive_connections=EMAIL_WORKERS * 10),
+        )
+
+    def payload(self, message: EmailOutbox) -> dict:
+        return {
+            "personalizations": [{"to": [{"email": message.to_email}]}],
+            "from": {"email": message.from_email or FROM_EMAIL},
+            "subject": message.subject,
+            "content": [{"type": "text/html", "value": message.content}],
+        }
+
+    async def send(self, message: EmailOutbox):
+        try:
+            response = await self.client.post(
+                self.url,
+                json=self.payload(message),
+                headers={"Authorization": f"Bearer {self.api_key}"},
+            )
+        except httpx.HTTPError as e:
+            raise EmailDeliveryError(f"{type(e).__name__}: {e}")
+
+        if response.status_code >= 400:
+            # rate limits and server errors are worth another try, other client errors are not
+            permanent = response.status_code < 500 and response.status_code != 429
+            raise EmailDeliveryError(f"SendGrid {response.status_code}: {response.text[:500]}", permanent)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class MemoryTransport(EmailTransport):
+    """Keeps sent messages in ``outbox``, for tests."""
+
+    def __init__(self):
+        self.outbox = []
+
+    async def send(self, message: EmailOutbox):
+        self.outbox.append({
+            "to_email": message.to_email,
+            "from_email": message.from_email or FROM_EMAIL,
+            "subject": message.subject,
+            "content": message.content,
+        })
+
+
+class FileTransport(EmailTransport):
+    """Writes each message to ``<directory>/<id>.eml``, for local development."""
+
+    def __init__(self, directory: str = EMAIL_FILE_PATH):
+        self.directory = directory
+
+    def write(self, message: EmailOutbox):
+        email = EmailMessage()
+        email["To"] = message.to_email
+        email["From"] = message.from_email or FROM_EMAIL or ""
+        email["Subject"] = message.subject
+        email.set_content(message.content, subtype="html")
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, f"{message.id}.eml"), "wb") as file:
+            file.write(email.as_bytes())
+
+    async def send(self, message: EmailOutbox):
+        await anyio.to_thread.run_sync(self.write, message)
+
+
+TRANSPORTS = {
+    "sendgrid": SendGridTransport,
+    "file": FileTransport,
+    "memory": MemoryTransport,
+}
+
+
+def retry_delay(attempts: int) -> float:
+    delay = min(EMAIL_RETRY_BASE_DELAY * 2 ** (attempts - 1), EMAIL_RETRY_MAX_DELAY)
+    # jitter keeps messages that failed together from retrying together
+    return delay * random.uniform(0.8, 1.2)
+
+
+class OutboxWorker:
+    """
+    Delivers EmailOutbox rows from background tasks on the application's event
+    loop. On PostgreSQL each batch is claimed with a single UPDATE over a
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` subquery, so several workers (or
+    several processes) never claim the same message. Other backends lock the
+    due ids first (SKIP LOCKED where supported), then update and reload them.
+    """
+
+    def __init__(self, transport: EmailTransport = None, workers: int = EMAIL_WORKERS,
+                 batch_size: int = EMAIL_BATCH_SIZE, poll_interval: float = EMAIL_POLL_INTERVAL):
+        self.transport = transport
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._tasks = []
+        self._loop = None
+        self._wakeups = []
+        self._stopping = None
+        self._owns_transport = False
+
+    def get_transport(self) -> EmailTransport:
+        if self.transport is None:
+            self.transport = TRANSPORTS[EMAIL_TRANSPORT]()
+            self._owns_transport = True
+        return self.transport
+
+    def due_clause(self, now: datetime):
+        stale = now - timedelta(seconds=EMAIL_SENDING_TIMEOUT)
+        return or_(
+            (EmailOutbox.status == EmailOutbox.PENDING) & (EmailOutbox.next_attempt_at <= now),
+            (EmailOutbox.status == EmailOutbox.SENDING) & (EmailOutbox.locked_at < stale),
+        )
+
+    def due_statement(self, now: datetime):
+        return (
+            select(EmailOutbox.id)
+            .where(self.due_clause(now))
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+
+    def claim_values(self, now: datetime) -> dict:
+        return {"status": EmailOutbox.SENDING, "attempts": EmailOutbox.attempts + 1, "locked_at": now}
+
+    def claim_statement(self, now: datetime):
+        """The PostgreSQL claim: one UPDATE ... RETURNING over the locked due ids."""
+        return (
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(self.due_statement(now).scalar_subquery()))
+            .values(**self.claim_values(now))
+            .returning(EmailOutbox)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def claim(self, session, now: datetime) -> list:
+        if session.get_bind().dialect.name == "postgresql":
+            return (await session.scalars(self.claim_statement(now))).all()
+
+        # MySQL can't UPDATE a table filtered by a subquery on itself and has no
+        # RETURNING, so lock the due ids first, then claim and reload them by id
+        ids = (await session.scalars(self.due_statement(now))).all()
+        if not ids:
+            return []
+        await session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids))
+            .values(**self.claim_values(now))
+            .execution_options(synchronize_session=False)
+        )
+        return (await session.scalars(
+            select(EmailOutbox).where(EmailOutbox.id.in_(ids)).execution_options(populate_existing=True)
+        )).all()
+
+    def record(self, message: EmailOutbox, error: Exception | None, now: datetime):
+        message.locked_at = None
+        if error is None:
+            message.status = EmailOutbox.SENT
+            message.sent_at = now
+            message.last_error = None
+            return
+
+        message.last_error = str(error)
+        if getattr(error, "permanent", False) or message.attempts >= EMAIL_MAX_ATTEMPTS:
+            message.status = EmailOutbox.FAILED
+            logger.error("Giving up on email %s to %s: %s", message.id, message.to_email, error)
+        else:
+            message.status = EmailOutbox.PENDING
+            message.next_attempt_at = now + timedelta(seconds=retry_delay(message.attempts))
+
+    async def deliver(self, message: EmailOutbox):
+        try:
+            await self.get_transport().send(message)
+        except Exception as e:
+            return e
+        return None
+
+    async def process_batch(self) -> int:
+        """Claim, send and record one batch; returns how many messages it held."""
+        async with async_session_scope() as scope:
+            session = scope.async_session
+            messages = await self.claim(session, datetime.now(timezone.utc))
+            await session.commit()
+            if not messages:
+                return 0
+
+            errors = await asyncio.gather(*(self.deliver(message) for message in messages))
+            now = datetime.now(timezone.utc)
+            for message, error in zip(messages, errors):
+                self.record(message, error, now)
+            await session.commit()
+            return len(messages)
+
+    async def drain(self):
+        """Process batches until nothing is due, e.g. at the end of a test."""
+        while await self.process_batch():
+            pass
+
+    async def sleep(self, wakeup: asyncio.Event):
+        """Wait for a wakeup, for stop() or for the poll interval, whichever comes first."""
+        wakeup.clear()
+        waiters = [asyncio.ensure_future(wakeup.wait()), asyncio.ensure_future(self._stopping.wait())]
+        try:
+            await asyncio.wait(waiters, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    async def run(self, wakeup: asyncio.Event):
+        # checked between batches: a cancellation swallowed while a session unwinds
+        # mid-batch must not send the worker back to sleep forever
+        while not self._stopping.is_set():
+            try:
+                if await self.process_batch() == self.batch_size:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Email outbox batch failed")
+
+            await self.sleep(wakeup)
+
+    def wake(self):
+        """Look for new messages now instead of at the next poll; safe from any thread."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.set_wakeups)
+
+    def set_wakeups(self):
+        # one event per worker, so a worker clearing its own can't swallow another's wakeup
+        for wakeup in self._wakeups:
+            wakeup.set()
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self._wakeups = [asyncio.Event() for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self.run(wakeup)) for wakeup in self._wakeups]
+
+    async def stop(self, timeout: float = EMAIL_STOP_TIMEOUT):
+        """Let in-flight batches finish for up to ``timeout`` seconds, then cancel them."""
+        if self._stopping is not None:
+            self._stopping.set()
+        if self._tasks:
+            _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                _, pending = await asyncio.wait(pending, timeout=timeout)
+            if pending:
+                logger.error("%s email outbox worker(s) did not stop", len(pending))
+        self._tasks = []
+        self._wakeups = []
+        self._loop = None
+        if self._owns_transport:
+            await self.transport.aclose()
+            self.transport = None
+            self._owns_transport = False
+
+
+outbox_worker = OutboxWorker()
+
+
+def enqueue_email(to_email, subject, content, from_email=None) -> EmailOutbox:
+    message = EmailOutbox.objects.create(
+        to_email=to_email, subject=subject, content=content, from_email=from_email
+    )
+    outbox_worker.wake()
+    return message
+
+
+async def aenqueue_email(to_email, subject, content, from_email=None) -> EmailOutbox:
+    message = await EmailOutbox.objects.acreate(
+        to_email=to_email, subject=subject, content=content, from_email=from_email
+    )
+    outbox_worker.wake()
+    return message
@@ -1,33 +1,50 @@
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-from jinja2 import Environment, FileSystemLoader
+import os
 
-from ..config import SENDGRID_API_KEY
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from ..config import DEBUG, TEMPLATE_CACHE_SIZE, TEMPLATE_BYTECODE_CACHE_DIR
+from .outbox import enqueue_email, aenqueue_email
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "html_templates")
+
+# built once: compiled templates stay in the environment's LRU cache, and outside
+# DEBUG the template files are not stat'ed again on every render
+template_env = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    cache_size=TEMPLATE_CACHE_SIZE,
+    auto_reload=DEBUG,
+    bytecode_cache=FileSystemBytecodeCache(TEMPLATE_BYTECODE_CACHE_DIR) if TEMPLATE_BYTECODE_CACHE_DIR else None,
+)
+# async templates compile to different code, so they get their own cache
+async_template_env = template_env.overlay(enable_async=True)
+
+
+def precompile_templates():
+    """Compile every template up front, so no request pays for the first render."""
+    for template_name in template_env.list_templates(extensions=["html", "txt"]):
+        template_env.get_template(template_name)
+        async_template_env.get_template(template_name)
 
 
 def render_template(template_name, **context):
-    template_loader = FileSystemLoader(searchpath="src/management/html_templates")
-    template_env = Environment(loader=template_loader)
     template = template_env.get_template(template_name)
 
     return template.render(context)
 
 
+async def arender_template(template_name, **context):
+    template = async_template_env.get_template(template_name)
+
+    return await template.render_async(context)
+
+
 def send_email(to_email, subject, content, from_email=None):
-    message = Mail(
-        from_email=from_email,
-        to_emails=to_email,
-        subject=subject,
-        html_content=content,
-    )
+    # queued in the email outbox; delivery and retries happen in the outbox worker
+    return enqueue_email(to_email, subject, content, from_email=from_email)
 
-    sg = SendGridAPIClient(SENDGRID_API_KEY)
 
-    try:
-        response = sg.send(message)
-        print(f"Email sent. Status code: {response.status_code}")
-    except Exception as e:
-        print(f"Error sending email: {str(e)}")
+async def asend_email(to_email, subject, content, from_email=None):
+    return await aenqueue_email(to_email, subject, content, from_email=from_email)
 
 
 def send_forgot_password(email, activation_code, username, from_email=None):
@@ -57,3 +74,32 @@ def send_new_account(
         content=content,
         from_email=from_email,
     )
+
+
+async def asend_forgot_password(email, activation_code, username, from_email=None):
+    context = {"username": username, "activation_code": activation_code}
+    content = await arender_template("forgot_password.html", **context)
+
+    await asend_email(
+        to_email=email,
+        subject="Password Reset",
+        content=content,
+        from_email=from_email,
+    )
+
+
+async def asend_new_account(
+    email: str, username: str, password: str, company_name: str, from_email: str = None
+):
+    context = {
+        "username": username,
+        "temporary_password": password,
+        "YOUR_COMPANY_NAME": company_name,
+    }
+    content = await arender_template("account_creation.html", **context)
+    await asend_email(
+        to_email=email,
+        subject="Account Created",
+        content=content,
+        from_email=from_email,
+    )
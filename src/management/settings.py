@@ -13,6 +13,23 @@ SENDGRID_API_KEY = os.environ.get("SENDGRID_API_KEY")
 FROM_EMAIL = os.environ.get("FROM_EMAIL")
 LOGGING_PATH = os.environ.get("LOGGING_PATH")
 
+# authenticated users are cached per token subject to skip the lookup on every request
+AUTH_USER_CACHE_TTL = int(os.environ.get("AUTH_USER_CACHE_TTL", 30))
+AUTH_USER_CACHE_SIZE = int(os.environ.get("AUTH_USER_CACHE_SIZE", 1024))
+
+# verified JWT payloads are reused until the token expires, or for at most JWT_CACHE_TTL seconds
+JWT_CACHE_TTL = int(os.environ.get("JWT_CACHE_TTL", 3600))
+JWT_CACHE_SIZE = int(os.environ.get("JWT_CACHE_SIZE", 4096))
+
+# bcrypt cost factor, and the pool that runs hashing off the event loop
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get("PASSWORD_HASH_QUEUE_SIZE", 32))
+
+# results cached by services constructed with a QueryCache
+QUERY_CACHE_TTL = int(os.environ.get("QUERY_CACHE_TTL", 60))
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", 2048))
+
 ACCESS_TOKEN_SETTINGS = {
     'USER_ID_CLAIM': 'user_id',
     'USER_ID_FIELD': 'id',
@@ -1,23 +1,46 @@
-from starlette.authentication import AuthenticationError
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.authentication import AuthCredentials, AuthenticationBackend, AuthenticationError, UnauthenticatedUser
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.websockets import WebSocketClose
 
 from src.utils.exception_handlers import exception_handler_base
 
 
-class AuthExceptionMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class AuthExceptionMiddleware:
+    """
+    Authenticates each request once with ``backend`` and shares the result through
+    the scope: ``auth`` and ``user`` as starlette's AuthenticationMiddleware sets
+    them, plus ``state.credentials``. Failures get the app's JSON error body.
+    """
+
+    def __init__(self, app: ASGIApp, backend: AuthenticationBackend):
+        self.app = app
+        self.backend = backend
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        conn = HTTPConnection(scope)
         try:
-            credentials = await self.app.backend.authenticate(request)
-            request.state.credentials = credentials
+            credentials = await self.backend.authenticate(conn)
         except AuthenticationError as exc:
-            return exception_handler_base(
-                request,
-                exc=str(exc),
-                status_code=401,
-                success=False
-            )
+            if scope["type"] == "websocket":
+                response = WebSocketClose()
+            else:
+                response = exception_handler_base(
+                    conn,
+                    exc=str(exc),
+                    status_code=401,
+                    success=False
+                )
+            await response(scope, receive, send)
+            return
 
-        response = await call_next(request)
+        scope.setdefault("state", {})["credentials"] = credentials
+        if credentials is None:
+            credentials = AuthCredentials(), UnauthenticatedUser()
+        scope["auth"], scope["user"] = credentials
 
-        return response
+        await self.app(scope, receive, send)
@@ -1,14 +1,18 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from src.utils.storage_backend import storage
 
 
-class BaseUrlMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class BaseUrlMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         # Set the base URL as a global variable
-        if storage.BASE_URL != str(request.base_url):
-            setattr(storage, 'BASE_URL', str(request.base_url))
+        if scope["type"] in ("http", "websocket"):
+            base_url = str(HTTPConnection(scope).base_url)
+            if storage.BASE_URL != base_url:
+                setattr(storage, 'BASE_URL', base_url)
 
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send)
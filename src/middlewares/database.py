@@ -0,0 +1,21 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.management.database.session import async_session_scope
+
+
+class DBSessionMiddleware:
+    """
+    Binds a fresh session scope to every request so each in-flight request
+    gets its own pooled connection instead of sharing one process-wide session.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        async with async_session_scope():
+            await self.app(scope, receive, send)
@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+# settings are read at import time, so the test database is chosen before anything imports src.config
+TEST_DIR = tempfile.mkdtemp(prefix="package-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("EMAIL_TRANSPORT", "memory")
+# the cheapest cost bcrypt accepts, so password tests stay fast
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest
+
+from src.config import engine
+from src.accounts.models import User
+from src.management.base import Base
+from src.management.database.session import session_scope
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db():
+    """A fresh schema and a session scope bound to the test."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with session_scope() as scope:
+        yield scope.session
+
+
+@pytest.fixture
+def make_user(db):
+    def make(number: int, **data):
+        data = {
+            "username": f"user{number}",
+            "first_name": "First",
+            "last_name": "Last",
+            "email": f"user{number}@example.com",
+            **data,
+        }
+        return User.objects.create(**data)
+
+    return make
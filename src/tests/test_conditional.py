@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+
+from src.accounts.models import User
+from src.middlewares.database import DBSessionMiddleware
+from src.utils.conditional import etag_matches, http_date, make_etag
+from src.utils.schemas import BaseSchema, PageFilter
+from src.utils.services import GenericCRUDService
+
+
+class UserSchema(BaseSchema):
+    id: int
+    username: str
+
+
+class ConditionalUserService(GenericCRUDService):
+    conditional_requests = True
+
+
+def anonymous(app):
+    async def asgi(scope, receive, send):
+        scope["user"] = None
+        await app(scope, receive, send)
+    return asgi
+
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    service = ConditionalUserService(User)
+
+    @app.get("/users")
+    def list_users(request: Request, page_filter: PageFilter = Depends()):
+        return service.list(request, page_filter, UserSchema)
+
+    @app.get("/users/{user_id}")
+    def get_user(request: Request, user_id: int):
+        return service.get(request, user_id, UserSchema)
+
+    app.add_middleware(DBSessionMiddleware)
+    return TestClient(anonymous(app))
+
+
+def test_get_answers_a_matching_etag_with_304(client, make_user):
+    user = make_user(1)
+
+    first = client.get(f"/users/{user.id}")
+    again = client.get(f"/users/{user.id}", headers={"If-None-Match": first.headers["etag"]})
+
+    assert first.status_code == 200
+    assert first.json()["data"] == {"id": user.id, "username": "user1"}
+    assert again.status_code == 304
+    assert again.content == b""
+
+
+def test_get_is_modified_after_an_update(client, make_user):
+    user = make_user(1)
+    first = client.get(f"/users/{user.id}")
+
+    # CURRENT_TIMESTAMP only has whole seconds on SQLite, so the new timestamp is set explicitly
+    later = datetime.now(timezone.utc) + timedelta(seconds=5)
+    User.objects.update(id=user.id, data={"username": "renamed", "updated": later})
+    again = client.get(f"/users/{user.id}", headers={"If-None-Match": first.headers["etag"]})
+
+    assert again.status_code == 200
+    assert again.json()["data"]["username"] == "renamed"
+
+
+def test_get_honours_if_modified_since(client, make_user):
+    user = make_user(1)
+    first = client.get(f"/users/{user.id}")
+
+    again = client.get(f"/users/{user.id}", headers={"If-Modified-Since": first.headers["last-modified"]})
+
+    assert again.status_code == 304
+
+
+def test_list_etag_changes_when_the_newest_row_is_deleted(client, make_user):
+    for number in range(3):
+        make_user(number)
+    first = client.get("/users")
+
+    User.objects.delete(id=3)
+    again = client.get("/users", headers={"If-None-Match": first.headers["etag"]})
+
+    assert first.status_code == 200
+    assert again.status_code == 200
+    assert [row["id"] for row in again.json()["data"]["results"]] == [2, 1]
+
+
+def test_list_ignores_if_modified_since(client, make_user):
+    # removing the newest row lowers max(updated), so a date can't tell the list changed
+    for number in range(3):
+        make_user(number)
+    first = client.get("/users")
+    since = http_date(datetime.now(timezone.utc) + timedelta(days=1))
+
+    User.objects.delete(id=3)
+    again = client.get("/users", headers={"If-Modified-Since": since})
+
+    assert "last-modified" not in first.headers
+    assert again.status_code == 200
+
+
+def test_etag_comparison_is_weak():
+    etag = make_etag("a", 1)
+
+    assert etag.startswith('W/"')
+    assert etag_matches(etag.removeprefix("W/"), etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
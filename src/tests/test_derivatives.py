@@ -0,0 +1,99 @@
+import io
+import os
+import stat
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from src.utils import storage_backend
+from src.utils.derivatives import DerivativeGenerator
+from src.utils.storage_backend import FILE_MODE, LocalStorageBackend
+
+
+@pytest.fixture(scope="module")
+def generator():
+    generator = DerivativeGenerator(workers=1, widths=(100, 200))
+    yield generator
+    generator.shutdown()
+
+
+@pytest.fixture
+def storage(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(storage_backend.storage, "backend", LocalStorageBackend(str(tmp_path)))
+    return storage_backend.storage
+
+
+def png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def store(storage, data: bytes, filename: str = "photo.png") -> str:
+    return storage.save(UploadFile(io.BytesIO(data), filename=filename)).path
+
+
+@pytest.mark.anyio
+async def test_renders_a_resized_readable_copy_once(generator, storage):
+    source = store(storage, png(400, 200))
+
+    key = await generator.get(source, 100, "webp")
+    path = storage.backend.path(key)
+    rendered_at = os.stat(path).st_mtime_ns
+
+    with Image.open(path) as image:
+        assert (image.format, image.size) == ("WEBP", (100, 50))
+    assert stat.S_IMODE(os.stat(path).st_mode) == FILE_MODE
+    # cached on disk: asked again, the same file is served
+    assert await generator.get(source, 100, "webp") == key
+    assert os.stat(path).st_mtime_ns == rendered_at
+
+
+@pytest.mark.anyio
+async def test_never_upscales(generator, storage):
+    source = store(storage, png(80, 40))
+
+    key = await generator.get(source, 200, "jpeg")
+
+    with Image.open(storage.backend.path(key)) as image:
+        assert image.size == (80, 40)
+
+
+@pytest.mark.anyio
+async def test_a_stored_file_that_is_not_an_image_is_415(generator, storage):
+    source = store(storage, b"%PDF-1.4 not an image", "photo.png")
+
+    with pytest.raises(HTTPException) as error:
+        await generator.get(source, 100)
+
+    assert error.value.status_code == 415
+
+
+@pytest.mark.anyio
+async def test_a_missing_source_is_404(generator, storage):
+    with pytest.raises(HTTPException) as error:
+        await generator.get(f"cas/00/00/{'0' * 64}.png", 100)
+
+    assert error.value.status_code == 404
+
+
+def test_only_content_keys_and_allowed_parameters_are_accepted(generator):
+    source = f"cas/ab/cd/{'abcd' * 16}.png"
+
+    assert generator.derivative_key(source, 100, "webp") == f"derivatives/ab/cd/{'abcd' * 16}_w100.webp"
+    for args in (("media/../secret.png", 100, "webp"), (source, 150, "webp"), (source, 100, "gif")):
+        with pytest.raises(ValueError):
+            generator.derivative_key(*args)
+
+
+@pytest.mark.anyio
+async def test_garbage_collection_removes_derivatives(generator, storage):
+    source = store(storage, png(400, 200))
+    keys = await generator.precompute(source)
+
+    storage.release(source)
+    storage.collect_garbage(grace=0)
+
+    assert not storage.backend.exists(source)
+    assert not any(storage.backend.exists(key) for key in keys)
@@ -0,0 +1,22 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from starlette.authentication import UnauthenticatedUser
+
+from src.main import app, database_pool_status
+
+
+def test_pool_status_route_is_off_by_default():
+    assert "/health/database" not in {route.path for route in app.routes}
+
+
+@pytest.mark.anyio
+async def test_pool_status_is_for_superadmins_only():
+    for user in (UnauthenticatedUser(), SimpleNamespace(is_superadmin=False)):
+        with pytest.raises(HTTPException) as excinfo:
+            await database_pool_status(SimpleNamespace(user=user))
+        assert excinfo.value.status_code == 403
+
+    status = await database_pool_status(SimpleNamespace(user=SimpleNamespace(is_superadmin=True)))
+    assert set(status) == {"sync", "async"}
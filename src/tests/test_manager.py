@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.accounts.models import User
+from src.management.database.session import async_session_scope
+from src.utils.exception_classes import ObjectDoesNotExist
+
+
+def test_get_or_create_returns_the_existing_row(make_user):
+    user = make_user(1)
+
+    obj, created = User.objects.get_or_create(email=user.email, defaults={"username": "other"})
+
+    assert not created
+    assert obj.id == user.id
+
+
+def test_get_or_create_inserts_on_a_unique_key(db):
+    defaults = {"username": "new", "first_name": "New", "last_name": "User"}
+
+    obj, created = User.objects.get_or_create(email="new@example.com", defaults=defaults)
+    again, created_again = User.objects.get_or_create(email="new@example.com", defaults=defaults)
+
+    assert created and not created_again
+    assert again.id == obj.id
+    assert User.objects.count() == 1
+
+
+def test_get_or_create_conflict_on_another_unique_field_raises(make_user):
+    user = make_user(1)
+
+    with pytest.raises(IntegrityError):
+        User.objects.get_or_create(username="new", first_name="New", last_name="User", email=user.email)
+
+    # the failed insert was rolled back, the session is still usable
+    assert User.objects.count() == 1
+
+
+def test_unique_key_only_matches_whole_constraints(db):
+    assert User.objects.unique_key(["email"]) == ["email"]
+    assert User.objects.unique_key(["id"]) == ["id"]
+    assert User.objects.unique_key(["username"]) is None
+    assert User.objects.unique_key(["email", "username"]) is None
+
+
+def test_get_by_primary_key(make_user):
+    user = make_user(1)
+
+    assert User.objects.get(id=user.id) is user
+    with pytest.raises(ObjectDoesNotExist):
+        User.objects.get(id=999)
+
+
+def test_in_bulk_is_a_plain_in_lookup(make_user):
+    users = [make_user(number) for number in range(5)]
+    User.objects.delete(id=users[0].id)
+
+    statements = list(User.objects.in_bulk_statements([user.id for user in users], chunk_size=2))
+    found = User.objects.in_bulk([user.id for user in users] + [999], chunk_size=2)
+
+    assert len(statements) == 3
+    assert all(not statement._order_by_clauses for statement in statements)
+    assert sorted(found) == [user.id for user in users]
+
+
+def test_valid_objects_in_bulk_leaves_out_deleted_rows(make_user):
+    users = [make_user(number) for number in range(3)]
+    User.objects.delete(id=users[0].id)
+
+    assert sorted(User.valid_objects.get_many([user.id for user in users])) == [users[1].id, users[2].id]
+
+
+@pytest.mark.anyio
+async def test_aget_or_create_conflict_on_another_unique_field_raises(make_user):
+    user = make_user(1)
+
+    async with async_session_scope():
+        with pytest.raises(IntegrityError):
+            await User.objects.aget_or_create(username="new", first_name="New", last_name="User", email=user.email)
+
+        obj, created = await User.objects.aget_or_create(email=user.email)
+        assert not created and obj.id == user.id
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from src.management.models import EmailOutbox
+from src.management.outbox import EmailTransport, MemoryTransport, OutboxWorker, aenqueue_email
+from src.management.database.session import async_session_scope
+
+
+class StuckTransport(EmailTransport):
+    """Never finishes a send and swallows the cancellation meant to stop it."""
+
+    def __init__(self):
+        self.sending = asyncio.Event()
+
+    async def send(self, message):
+        self.sending.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            pass
+
+
+@pytest.mark.anyio
+async def test_drain_claims_and_sends_every_due_message(db):
+    transport = MemoryTransport()
+    worker = OutboxWorker(transport=transport, batch_size=2)
+
+    async with async_session_scope():
+        for number in range(3):
+            await aenqueue_email(f"user{number}@example.com", "Subject", "<p>Hello</p>")
+    await worker.drain()
+
+    assert sorted(message["to_email"] for message in transport.outbox) == [
+        "user0@example.com", "user1@example.com", "user2@example.com"
+    ]
+    assert {message.status for message in EmailOutbox.objects.all()} == {EmailOutbox.SENT}
+    assert {message.attempts for message in EmailOutbox.objects.all()} == {1}
+
+
+@pytest.mark.anyio
+async def test_wake_reaches_every_worker(db):
+    worker = OutboxWorker(transport=MemoryTransport(), workers=3, poll_interval=60)
+    await worker.start()
+    try:
+        await asyncio.sleep(0.1)
+        assert not any(wakeup.is_set() for wakeup in worker._wakeups)
+
+        worker.wake()
+        await asyncio.sleep(0)
+
+        assert len(worker._wakeups) == 3
+        assert all(wakeup.is_set() for wakeup in worker._wakeups)
+    finally:
+        await worker.stop()
+
+
+@pytest.mark.anyio
+async def test_stop_returns_with_a_batch_in_flight(db):
+    transport = StuckTransport()
+    worker = OutboxWorker(transport=transport, workers=2, poll_interval=60)
+
+    async with async_session_scope():
+        await aenqueue_email("user0@example.com", "Subject", "<p>Hello</p>")
+    await worker.start()
+    await asyncio.wait_for(transport.sending.wait(), 5)
+
+    await asyncio.wait_for(worker.stop(timeout=0.2), 5)
+
+    assert worker._tasks == []
@@ -0,0 +1,72 @@
+import pytest
+
+from src.accounts.models import User
+from src.management.database.session import async_session_scope
+from src.utils.get_objects import AsyncCursorPaginator, CursorPaginator, decode_cursor
+
+
+def walk(queryset, per_page, max_pages=20):
+    pages, cursor = [], None
+    for _ in range(max_pages):
+        page = CursorPaginator(User, queryset, per_page=per_page, cursor=cursor)
+        data = page.get_page()
+        pages.append([user.id for user in page.object_list()])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            return pages
+    raise AssertionError(f"pagination did not end after {max_pages} pages: {pages}")
+
+
+def test_cursor_pages_walk_every_row_once(make_user):
+    # created in the same second, so the pages only move forward through the id tie breaker
+    for number in range(7):
+        make_user(number)
+
+    pages = walk(User.valid_objects.filter_query(), per_page=3)
+
+    assert pages == [[7, 6, 5], [4, 3, 2], [1]]
+
+
+def test_cursor_previous_page_returns_to_the_start(make_user):
+    for number in range(7):
+        make_user(number)
+    queryset = User.valid_objects.filter_query()
+
+    first = CursorPaginator(User, queryset, per_page=3)
+    first.get_page()
+    second = CursorPaginator(User, queryset, per_page=3, cursor=first.next_cursor)
+    second.get_page()
+    back = CursorPaginator(User, queryset, per_page=3, cursor=second.previous_cursor)
+    back.get_page()
+
+    assert [user.id for user in second.object_list()] == [4, 3, 2]
+    assert [user.id for user in back.object_list()] == [7, 6, 5]
+    assert back.previous_cursor is None
+
+
+def test_cursor_rejects_garbage():
+    with pytest.raises(ValueError, match="^Invalid pagination cursor$"):
+        decode_cursor("not-a-cursor")
+
+
+async def awalk(queryset, per_page, max_pages=20):
+    pages, cursor = [], None
+    for _ in range(max_pages):
+        page = AsyncCursorPaginator(User, queryset, per_page=per_page, cursor=cursor)
+        data = await page.get_page()
+        pages.append([user.id for user in page.object_list()])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            return pages
+    raise AssertionError(f"pagination did not end after {max_pages} pages: {pages}")
+
+
+@pytest.mark.anyio
+async def test_async_cursor_pages_walk_every_row_once(make_user):
+    for number in range(5):
+        make_user(number)
+
+    async with async_session_scope():
+        pages = await awalk(User.valid_objects.select_query(), per_page=2)
+
+    assert pages == [[5, 4], [3, 2], [1]]
@@ -0,0 +1,39 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from src.authentication import auth
+from src.management.settings import BCRYPT_ROUNDS
+
+
+@pytest.mark.anyio
+async def test_averify_password_accepts_what_ahash_password_produced():
+    hashed = await auth.ahash_password("Passw0rd@")
+
+    assert hashed.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+    assert await auth.averify_password("Passw0rd@", hashed)
+    assert not await auth.averify_password("wrong", hashed)
+    assert auth.verify_password("Passw0rd@", hashed)
+
+
+@pytest.mark.anyio
+async def test_a_full_password_queue_answers_503(monkeypatch):
+    monkeypatch.setattr(auth, "PASSWORD_HASH_QUEUE_SIZE", 1)
+    limit = auth.PASSWORD_HASH_WORKERS + 1
+    release = threading.Event()
+
+    jobs = [asyncio.ensure_future(auth.run_password_job(release.wait, 5)) for _ in range(limit)]
+    await asyncio.sleep(0)
+    try:
+        with pytest.raises(HTTPException) as excinfo:
+            await auth.run_password_job(release.wait, 5)
+        assert excinfo.value.status_code == 503
+        assert excinfo.value.headers == {"Retry-After": "1"}
+    finally:
+        release.set()
+        await asyncio.gather(*jobs)
+
+    # the finished jobs gave their slots back
+    assert await auth.run_password_job(len, "free")
@@ -0,0 +1,146 @@
+import asyncio
+import gc
+import threading
+import time
+
+import pytest
+
+from src.accounts.models import User
+from src.management.database.manager import BaseManager
+from src.utils.query_cache import LocalCacheBackend, QueryCache
+
+
+def listeners():
+    return BaseManager._change_listeners.get(User, [])
+
+
+def test_hits_return_copies(db):
+    cache = QueryCache()
+    cache.get_or_set(User, ("list",), lambda: {"results": [1, 2]})
+
+    first = cache.get_or_set(User, ("list",), lambda: None)
+    first["results"].append(3)
+
+    assert cache.get_or_set(User, ("list",), lambda: None) == {"results": [1, 2]}
+
+
+def test_writes_invalidate_the_model(make_user):
+    cache = QueryCache()
+    loads = []
+
+    def load():
+        loads.append(1)
+        return User.objects.count()
+
+    assert cache.get_or_set(User, ("count",), load) == 0
+    assert cache.get_or_set(User, ("count",), load) == 0
+    make_user(1)
+
+    assert cache.get_or_set(User, ("count",), load) == 1
+    assert len(loads) == 2
+
+
+def test_generations_live_in_the_shared_backend(make_user):
+    # two workers sharing one backend: a write seen by one invalidates the other's entries
+    backend = LocalCacheBackend()
+    worker, other_worker = QueryCache(backend), QueryCache(backend)
+    other_worker.get_or_set(User, ("count",), lambda: "stale")
+
+    worker.invalidate(User)
+
+    assert other_worker.get_or_set(User, ("count",), lambda: "fresh") == "fresh"
+
+
+def test_close_and_collection_remove_the_change_listener(db):
+    before = len(listeners())
+    cache = QueryCache()
+    cache.make_key(User, "list")
+    assert len(listeners()) == before + 1
+
+    cache.close()
+    assert len(listeners()) == before
+
+    cache = QueryCache()
+    cache.make_key(User, "list")
+    del cache
+    gc.collect()
+    assert len(listeners()) == before
+
+
+def test_concurrent_misses_load_once(db):
+    cache = QueryCache()
+    calls = []
+
+    def load():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_set(User, ("slow",), load)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+
+
+@pytest.mark.anyio
+async def test_concurrent_async_misses_load_once(db):
+    cache = QueryCache()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": 1}
+
+    results = await asyncio.gather(*(cache.aget_or_set(User, ("slow",), load) for _ in range(5)))
+
+    assert results == [{"value": 1}] * 5
+    assert len(calls) == 1
+    # every waiter got its own copy
+    assert len({id(result) for result in results}) == 5
+
+
+@pytest.mark.anyio
+async def test_waiters_reload_when_the_loading_request_is_cancelled(db):
+    cache = QueryCache()
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(10)
+
+    async def fast():
+        return "value"
+
+    loading = asyncio.create_task(cache.aget_or_set(User, ("key",), slow))
+    await started.wait()
+    waiting = asyncio.create_task(cache.aget_or_set(User, ("key",), fast))
+    await asyncio.sleep(0)
+    loading.cancel()
+
+    assert await waiting == "value"
+    with pytest.raises(asyncio.CancelledError):
+        await loading
+
+
+@pytest.mark.anyio
+async def test_loader_errors_reach_the_waiters(db):
+    cache = QueryCache()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        *(cache.aget_or_set(User, ("key",), fail) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,44 @@
+import pytest
+
+from src.accounts.models import User
+from src.management.database.manager import ValidManager
+from src.management.database.search import ContainsSearch, get_search_backend
+
+
+class FirstNameManager(ValidManager):
+    # searching any field only looks at first_name
+    def get_searchset(self, search_kwargs: dict):
+        return [User.first_name.icontains(term) for term in search_kwargs.values()]
+
+
+def test_contains_search_matches_case_insensitively(make_user):
+    make_user(1, first_name="Ada")
+    make_user(2, first_name="Grace")
+
+    results = User.valid_objects.filter_query(search_kwargs={"first_name": "ADA"}).all()
+
+    assert [user.first_name for user in results] == ["Ada"]
+
+
+def test_contains_search_escapes_wildcards(make_user):
+    make_user(1, first_name="100%")
+    make_user(2, first_name="1000")
+
+    results = User.valid_objects.filter_query(search_kwargs={"first_name": "100%"}).all()
+
+    assert [user.first_name for user in results] == ["100%"]
+
+
+def test_get_searchset_overrides_are_honoured(make_user):
+    make_user(1, first_name="Ada", last_name="Lovelace")
+    make_user(2, first_name="Grace", last_name="Ada")
+
+    results = FirstNameManager(User).filter_query(search_kwargs={"last_name": "ada"}).all()
+
+    assert [user.first_name for user in results] == ["Ada"]
+
+
+def test_unknown_backends_are_rejected():
+    assert isinstance(get_search_backend("contains"), ContainsSearch)
+    with pytest.raises(ValueError, match="bogus"):
+        get_search_backend("bogus")
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from src.accounts.models import User
+from src.utils.response_classes import CJSONResponse
+from src.utils.schemas import BaseSchema
+from src.utils.serializers import RowExporter, serialize_rows
+from src.utils.services import GenericCRUDService
+
+
+class EventSchema(BaseSchema):
+    id: int
+    name: str
+    created: datetime
+
+
+class FastService(GenericCRUDService):
+    fast_serialization = True
+
+
+ROWS = [
+    SimpleNamespace(id=1, name="utc", created=datetime(2024, 1, 1, tzinfo=timezone.utc)),
+    SimpleNamespace(id=2, name="offset", created=datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=1)))),
+    SimpleNamespace(id=3, name="naive", created=datetime(2024, 1, 1, 12, 0, 0, 500)),
+]
+
+
+def regular_body(items, page_data=None) -> bytes:
+    response = GenericCRUDService(User).list_response(EventSchema, items, page_data)
+    return CJSONResponse(content=response.dict()).body
+
+
+def test_fast_serialization_matches_the_regular_path():
+    # UTC datetimes differ by design (see test_utc_datetimes_end_in_z), so they are left out
+    rows = ROWS[1:]
+    page_data = {"count": 2, "next": None, "previous": None, "page_index": 1, "page_size": 10, "total_count": 2}
+
+    fast = FastService(User).list_response(EventSchema, rows, page_data)
+
+    assert fast.body == regular_body(rows, page_data)
+
+
+def test_utc_datetimes_end_in_z():
+    assert serialize_rows(EventSchema, ROWS[:1]) == b'[{"id":1,"name":"utc","created":"2024-01-01T00:00:00Z"}]'
+
+
+def test_csv_export_has_a_header_and_one_line_per_row():
+    exporter = RowExporter(EventSchema, "csv")
+
+    lines = (exporter.header() + exporter.encode(ROWS)).decode().splitlines()
+
+    assert lines[0] == "id,name,created"
+    assert len(lines) == 4
@@ -0,0 +1,86 @@
+import hashlib
+import io
+import os
+import stat
+
+import pytest
+from fastapi import UploadFile
+
+from src.config import UPLOAD_CHUNK_SIZE
+from src.utils import image
+from src.utils.storage_backend import FILE_MODE
+
+
+@pytest.fixture
+def media_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(image, "MEDIA_ROOT", str(tmp_path))
+    return tmp_path
+
+
+def upload(data: bytes, filename: str = "report.pdf") -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename=filename)
+
+
+def test_save_file_hashes_the_upload_in_chunks(media_root):
+    data = os.urandom(UPLOAD_CHUNK_SIZE * 3 + 17)
+
+    saved = image.save_file_with_digest("docs", upload(data))
+
+    assert saved.path == "docs/report.pdf"
+    assert saved.sha256 == hashlib.sha256(data).hexdigest()
+    assert saved.size == len(data)
+    assert (media_root / "docs" / "report.pdf").read_bytes() == data
+
+
+def test_saved_files_are_readable_like_normally_created_files(media_root):
+    path = image.save_file("docs", upload(b"public"))
+
+    mode = stat.S_IMODE(os.stat(media_root / path).st_mode)
+    assert mode == FILE_MODE
+    assert mode & stat.S_IROTH
+
+
+def test_taken_names_get_a_hash_suffix(media_root):
+    first = image.save_file("docs", upload(b"first"))
+    second = image.save_file_with_digest("docs", upload(b"second"))
+
+    assert first == "docs/report.pdf"
+    assert second.path == f"docs/report_{second.sha256[:12]}.pdf"
+    assert (media_root / first).read_bytes() == b"first"
+
+
+def test_names_are_claimed_without_hard_links(media_root, monkeypatch):
+    def link(source, target):
+        raise PermissionError(1, "Operation not permitted")
+
+    monkeypatch.setattr(os, "link", link)
+    first = image.save_file("docs", upload(b"first"))
+    second = image.save_file_with_digest("docs", upload(b"second"))
+
+    assert first == "docs/report.pdf"
+    assert second.path == f"docs/report_{second.sha256[:12]}.pdf"
+    assert (media_root / first).read_bytes() == b"first"
+    assert (media_root / second.path).read_bytes() == b"second"
+    assert sorted(os.listdir(media_root / "docs")) == ["report.pdf", os.path.basename(second.path)]
+
+
+def test_oversized_uploads_leave_nothing_behind(media_root):
+    with pytest.raises(ValueError):
+        image.save_file("docs", upload(b"x" * 1024), max_size=100)
+
+    assert os.listdir(media_root / "docs") == []
+
+
+@pytest.mark.anyio
+async def test_asave_file_matches_save_file(media_root):
+    data = os.urandom(UPLOAD_CHUNK_SIZE + 1)
+
+    saved = await image.asave_file_with_digest("docs", upload(data))
+
+    assert saved.sha256 == hashlib.sha256(data).hexdigest()
+    assert stat.S_IMODE(os.stat(media_root / saved.path).st_mode) == FILE_MODE
+
+
+@pytest.mark.anyio
+async def test_asave_file_returns_the_stored_path(media_root):
+    assert await image.asave_file("docs", upload(b"data")) == "docs/report.pdf"
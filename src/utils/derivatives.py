@@ -0,0 +1,126 @@
+import asyncio
+import multiprocessing
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import anyio
+from fastapi import HTTPException
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from src.config import IMAGE_WORKERS, IMAGE_DERIVATIVE_WIDTHS, IMAGE_DERIVATIVE_QUALITY
+from src.utils.storage_backend import derived_prefix, make_readable, storage
+
+# format name -> (Pillow format, file extension, media type)
+DERIVATIVE_FORMATS = {
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+    "png": ("PNG", ".png", "image/png"),
+}
+
+CONTENT_KEY = re.compile(r"^cas/[0-9a-f]{2}/[0-9a-f]{2}/(?P<sha256>[0-9a-f]{64})(\.\w+)?$")
+
+
+def render_derivative(source_path: str, target_path: str, width: int, image_format: str, quality: int) -> str:
+    """Resize ``source_path`` to at most ``width`` pixels wide. Runs in a pool process."""
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            image = image.resize((width, max(round(image.height * width / image.width), 1)), Image.LANCZOS)
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        target_dir = os.path.dirname(target_path)
+        os.makedirs(target_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=target_dir, prefix=".render-", suffix=".part")
+        os.close(fd)
+        try:
+            image.save(temp_path, image_format, quality=quality)
+            make_readable(temp_path)
+            os.replace(temp_path, target_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    return target_path
+
+
+class DerivativeGenerator:
+    """
+    Resized copies of stored images, made in a process pool so Pillow never
+    holds the event loop or the GIL of the serving process. A derivative is
+    cached on disk under ``derivatives/`` keyed by the source's content hash,
+    width and format, so it is rendered once and then served as a file;
+    concurrent requests for one missing derivative share a single render.
+    """
+
+    def __init__(self, workers: int = IMAGE_WORKERS, widths=IMAGE_DERIVATIVE_WIDTHS,
+                 quality: int = IMAGE_DERIVATIVE_QUALITY):
+        self.workers = workers
+        self.widths = widths
+        self.quality = quality
+        self._executor = None
+        self._pending = {}
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawned, not forked, so workers don't inherit the server's threads and sockets
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def derivative_key(self, source_key: str, width: int, image_format: str) -> str:
+        match = CONTENT_KEY.match(source_key)
+        if match is None:
+            raise ValueError("Derivatives can only be made from content-addressed media")
+        if width not in self.widths:
+            raise ValueError(f"Width must be one of {', '.join(map(str, self.widths))}")
+        if image_format not in DERIVATIVE_FORMATS:
+            raise ValueError(f"Format must be one of {', '.join(DERIVATIVE_FORMATS)}")
+
+        extension = DERIVATIVE_FORMATS[image_format][1]
+        return f"{derived_prefix(match.group('sha256'))}w{width}{extension}"
+
+    async def render(self, source_key: str, key: str, width: int, image_format: str):
+        source_path, target_path = storage.backend.path(source_key), storage.backend.path(key)
+        if not await anyio.to_thread.run_sync(os.path.exists, source_path):
+            raise HTTPException(status_code=404)
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self.executor, render_derivative,
+                source_path, target_path, width, DERIVATIVE_FORMATS[image_format][0], self.quality,
+            )
+        except UnidentifiedImageError:
+            raise HTTPException(status_code=415, detail="The stored file is not an image")
+        except Image.DecompressionBombError:
+            raise HTTPException(status_code=400, detail="The stored image is too large to resize")
+
+    async def get(self, source_key: str, width: int, image_format: str = "webp") -> str:
+        """The storage key of the derivative, rendering it first when it is not cached yet."""
+        key = self.derivative_key(source_key, width, image_format)
+        if await anyio.to_thread.run_sync(storage.backend.exists, key):
+            return key
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = asyncio.ensure_future(self.render(source_key, key, width, image_format))
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        await asyncio.shield(pending)
+        return key
+
+    async def precompute(self, source_key: str, image_format: str = "webp", widths=None) -> list:
+        """Render every allowed width ahead of the first request, e.g. right after an upload."""
+        return await asyncio.gather(*(
+            self.get(source_key, width, image_format) for width in widths or self.widths
+        ))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+derivatives = DerivativeGenerator()
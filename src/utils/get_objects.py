@@ -0,0 +1,194 @@
+import base64
+import json
+from datetime import datetime
+from math import ceil
+
+from src.utils.exception_classes import PageNotAnInteger, EmptyPage
+
+
+class BasePaginator:
+    """
+    Offset pagination over a filtered queryset. Subclasses only decide how the
+    count and the page rows are fetched (sync Query or async Select).
+    ``count_mode`` is one of 'exact', 'estimated', 'none' or 'auto'.
+    """
+
+    def __init__(self, model, queryset, request=None, per_page: int = 10, count_mode: str = "exact"):
+        self.model = model
+        self.queryset = queryset
+        self.request = request
+        self.per_page = int(per_page)
+        self.count_mode = count_mode
+        self.page_index = 1
+        self.total_count = None
+        self.has_next = False
+        self._object_list = []
+
+    @property
+    def total_page(self) -> int | None:
+        if self.total_count is None:
+            return None
+        if self.per_page < 1:
+            return 1
+        return max(ceil(self.total_count / self.per_page), 1)
+
+    def validate_number(self, number) -> int:
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("That page number is not an integer")
+
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+        return number
+
+    def clean_number(self, number) -> int:
+        try:
+            number = self.validate_number(number)
+        except (PageNotAnInteger, EmptyPage):
+            return 1
+
+        # only an exact count is trustworthy enough to clamp the page to
+        if self.count_mode == "exact":
+            return min(number, self.total_page)
+        return number
+
+    @property
+    def offset(self) -> int:
+        return (self.page_index - 1) * self.per_page
+
+    def set_page(self, rows):
+        # one extra row is fetched so the next link does not depend on the count
+        rows = list(rows)
+        self.has_next = len(rows) > self.per_page
+        self._object_list = rows[:self.per_page]
+
+    def page_url(self, page_index: int):
+        if self.request is None:
+            return None
+        return str(self.request.url.include_query_params(page_index=page_index))
+
+    def get_page_data(self) -> dict:
+        has_previous = self.page_index > 1
+        return {
+            "count": len(self._object_list),
+            "next": self.page_url(self.page_index + 1) if self.has_next else None,
+            "previous": self.page_url(self.page_index - 1) if has_previous else None,
+            "total_count": self.total_count,
+            "total_page": self.total_page,
+            "page_index": self.page_index,
+            "page_size": self.per_page,
+            "count_mode": self.count_mode,
+        }
+
+    def object_list(self):
+        return self._object_list
+
+
+class Paginator(BasePaginator):
+
+    def get_page(self, page_index) -> dict:
+        self.total_count, self.count_mode = self.model.objects.page_count(
+            self.queryset, mode=self.count_mode
+        )
+        self.page_index = self.clean_number(page_index)
+        self.set_page(
+            self.model.objects.get_multi(self.queryset, skip=self.offset, limit=self.per_page + 1)
+        )
+        return self.get_page_data()
+
+
+class AsyncPaginator(BasePaginator):
+
+    async def get_page(self, page_index) -> dict:
+        self.total_count, self.count_mode = await self.model.objects.apage_count(
+            self.queryset, mode=self.count_mode
+        )
+        self.page_index = self.clean_number(page_index)
+        self.set_page(
+            await self.model.objects.aget_multi(self.queryset, skip=self.offset, limit=self.per_page + 1)
+        )
+        return self.get_page_data()
+
+
+def encode_cursor(direction: str, obj) -> str:
+    value = json.dumps([direction, obj.created.isoformat(), obj.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, created, pk = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in ("next", "previous"):
+            raise ValueError
+        return direction, (datetime.fromisoformat(created), pk)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid pagination cursor")
+
+
+class BaseCursorPaginator(BasePaginator):
+    """
+    Keyset pagination on (created, id). Pages are addressed by opaque cursors and
+    no total count is computed, so every page costs the same to fetch.
+    """
+
+    def __init__(self, model, queryset, request=None, per_page: int = 10, cursor: str = None):
+        super().__init__(model, queryset, request=request, per_page=per_page)
+        self.cursor = cursor
+        self.reverse = False
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    def page_query(self):
+        direction, position = decode_cursor(self.cursor) if self.cursor else ("next", None)
+        self.reverse = direction == "previous"
+        query = self.model.objects.keyset_filter(self.queryset, position, reverse=self.reverse)
+        # one extra row tells whether another page exists in the direction of travel
+        return query.limit(self.per_page + 1)
+
+    def set_page(self, rows):
+        rows = list(rows)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if self.reverse:
+            rows.reverse()
+            has_next, has_previous = bool(rows), has_more
+        else:
+            has_next, has_previous = has_more, self.cursor is not None
+
+        self._object_list = rows
+        self.next_cursor = encode_cursor("next", rows[-1]) if has_next and rows else None
+        self.previous_cursor = encode_cursor("previous", rows[0]) if has_previous and rows else None
+
+    def cursor_url(self, cursor: str):
+        if self.request is None or cursor is None:
+            return None
+        return str(self.request.url.include_query_params(cursor=cursor))
+
+    def get_page_data(self) -> dict:
+        return {
+            "count": len(self._object_list),
+            "next": self.cursor_url(self.next_cursor),
+            "previous": self.cursor_url(self.previous_cursor),
+            "next_cursor": self.next_cursor,
+            "previous_cursor": self.previous_cursor,
+            "total_count": None,
+            "total_page": None,
+            "page_index": None,
+            "page_size": self.per_page,
+        }
+
+
+class CursorPaginator(BaseCursorPaginator):
+
+    def get_page(self) -> dict:
+        self.set_page(self.page_query().all())
+        return self.get_page_data()
+
+
+class AsyncCursorPaginator(BaseCursorPaginator):
+
+    async def get_page(self) -> dict:
+        self.set_page(await self.model.objects.ascalars(self.page_query()))
+        return self.get_page_data()
@@ -1,11 +1,14 @@
 import os
-import random
-import shutil
-import string
+from functools import partial
 
+import anyio
+from fastapi import UploadFile
 from PIL import Image, ImageDraw
 
-from src.config import MEDIA_ROOT
+from src.config import MEDIA_ROOT, MAX_FILE_SIZE
+from src.utils.storage_backend import (
+    FILE_MODE, SavedFile, awrite_upload, make_readable, remove_file, write_upload
+)
 
 
 # load_dotenv()
@@ -21,27 +24,79 @@ def save_img(folder, file):
     return destination
 
 
-def save_file(folder, file):
-    # file_dir = os.path.join(MEDIA_ROOT, "media", "attachement", folder)
+def claim_name(temp_path: str, path: str):
+    """Move ``temp_path`` to ``path``, raising FileExistsError instead of overwriting."""
+    try:
+        os.link(temp_path, path)
+    except FileExistsError:
+        raise
+    except OSError:
+        # no hard links on this file system (e.g. some network or FUSE mounts):
+        # reserve the name with an exclusive create, then move the file over it
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, FILE_MODE))
+        os.replace(temp_path, path)
+    else:
+        os.remove(temp_path)
+
+
+def publish_file(temp_path: str, file_dir: str, filename: str, sha256: str) -> str:
+    """
+    Move a fully written upload into place and return its final name. The
+    original name is claimed without overwriting; when it is taken the file
+    goes to ``<name>_<hash prefix><ext>``, where an identical earlier upload is
+    simply replaced by the same bytes.
+    """
+    make_readable(temp_path)
+    try:
+        claim_name(temp_path, os.path.join(file_dir, filename))
+        return filename
+    except FileExistsError:
+        base, extension = os.path.splitext(filename)
+        filename = f"{base}_{sha256[:12]}{extension}"
+        os.replace(temp_path, os.path.join(file_dir, filename))
+        return filename
+
+
+def save_file(folder, file, max_size: int = MAX_FILE_SIZE) -> str:
+    return save_file_with_digest(folder, file, max_size).path
+
+
+def save_file_with_digest(folder, file, max_size: int = MAX_FILE_SIZE) -> SavedFile:
+    """Like save_file, but also returns the upload's sha256 and size."""
     file_dir = os.path.join(MEDIA_ROOT, folder)
-    file_path = os.path.join(file_dir, file.filename)
+    temp_path, sha256, size = write_upload(file, file_dir, max_size)
+    try:
+        filename = publish_file(temp_path, file_dir, os.path.basename(file.filename), sha256)
+    except BaseException:
+        remove_file(temp_path)
+        raise
 
-    if not os.path.exists(file_dir):
-        os.makedirs(file_dir)
+    return SavedFile(os.path.join(folder, filename).replace("\\", "/"), sha256, size)
 
-    if os.path.exists(file_path):
-        base, extension = os.path.splitext(file_path)
 
-        while os.path.exists(file_path):
-            base = base + '_' + ''.join(random.choices(string.ascii_uppercase, k=5))
-            file_path = f"{base}{extension}"
+async def asave_file(folder, file: UploadFile, max_size: int = MAX_FILE_SIZE) -> str:
+    return (await asave_file_with_digest(folder, file, max_size)).path
 
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
 
-    stored_path = os.path.join(folder, file.filename).replace("\\", "/")
-    # destination = os.path.join(file_dir, file.filename)
-    return stored_path
+async def asave_file_with_digest(folder, file: UploadFile, max_size: int = MAX_FILE_SIZE) -> SavedFile:
+    """
+    Stream an upload to MEDIA_ROOT/folder in UPLOAD_CHUNK_SIZE chunks with every
+    file system call off the event loop. The upload is hashed as it is written
+    and aborted as soon as it passes ``max_size``; a partial file is never
+    visible under its final name.
+    """
+    file_dir = os.path.join(MEDIA_ROOT, folder)
+    temp_path, sha256, size = await awrite_upload(file, file_dir, max_size)
+    try:
+        filename = await anyio.to_thread.run_sync(
+            partial(publish_file, temp_path, file_dir, os.path.basename(file.filename), sha256)
+        )
+    except BaseException:
+        with anyio.CancelScope(shield=True):
+            await anyio.to_thread.run_sync(remove_file, temp_path)
+        raise
+
+    return SavedFile(os.path.join(folder, filename).replace("\\", "/"), sha256, size)
 
 
 def create_and_save_image(folder, filename, width, height):
@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import json
+import pickle
+import uuid
+import weakref
+from threading import Lock
+
+from starlette.responses import Response
+
+from src.management.database.manager import BaseManager
+from src.management.settings import QUERY_CACHE_TTL, QUERY_CACHE_SIZE
+from src.utils.cache import TTLCache
+
+_missing = object()
+
+
+class CacheBackend:
+    """
+    Storage used by QueryCache. Implement these four methods to plug in another
+    store; values are bytes and generation tokens are strings.
+    """
+
+    def get(self, key: str, default=None):
+        raise NotImplementedError
+
+    def set(self, key: str, value, ttl: float = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class LocalCacheBackend(CacheBackend):
+    """In-process LRU with a time to live, shared by the threads of one worker."""
+
+    def __init__(self, maxsize: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: str, default=None):
+        value = self._cache.get(key, _missing)
+        return default if value is _missing else value
+
+    def set(self, key: str, value, ttl: float = None):
+        self._cache.set(key, value, ttl)
+
+    def delete(self, key: str):
+        self._cache.pop(key)
+
+    def clear(self):
+        self._cache.clear()
+
+
+class FrozenResponse:
+    """The rendered parts of a response, so a cached one is rebuilt rather than shared."""
+
+    def __init__(self, response: Response):
+        self.body = response.body
+        self.status_code = response.status_code
+        self.media_type = response.media_type
+
+    def thaw(self) -> Response:
+        return Response(self.body, status_code=self.status_code, media_type=self.media_type)
+
+
+def freeze(value) -> bytes:
+    """Serialize a cached value, so every reader gets its own copy and any backend can store it."""
+    return pickle.dumps(FrozenResponse(value) if isinstance(value, Response) else value)
+
+
+def thaw(value: bytes):
+    value = pickle.loads(value)
+    return value.thaw() if isinstance(value, FrozenResponse) else value
+
+
+def watch_changes(cache_ref):
+    """
+    Listener bumping the generation of a changed model. It only holds a weak
+    reference, so registering it doesn't keep the cache alive.
+    """
+    def invalidate(model, instance=None):
+        cache = cache_ref()
+        if cache is not None:
+            cache.invalidate(model, instance)
+
+    return invalidate
+
+
+def remove_listeners(models: dict):
+    for model, callback in models.items():
+        BaseManager.remove_change_listener(model, callback)
+    models.clear()
+
+
+class QueryCache:
+    """
+    Caches query results per model. Keys carry a per model generation token,
+    kept in the backend so every worker sharing it sees the same one. Every
+    save, update, delete or bulk write of the model replaces the token (through
+    the manager's change listeners), so stale entries are never read again and
+    simply age out of the backend. Values are stored serialized and every hit
+    returns a fresh copy.
+
+    Concurrent misses on the same key are collapsed: one caller runs the loader
+    while the others wait for its result.
+    """
+
+    def __init__(self, backend: CacheBackend = None, ttl: float = None):
+        self.backend = backend or LocalCacheBackend()
+        self.ttl = ttl
+        self._lock = Lock()
+        self._key_locks = {}
+        self._pending = {}
+        # model -> its change listener, removed by close() or once the cache is collected
+        self._listeners = {}
+        self._finalizer = weakref.finalize(self, remove_listeners, self._listeners)
+
+    def watch(self, model):
+        with self._lock:
+            if model not in self._listeners:
+                callback = watch_changes(weakref.ref(self))
+                self._listeners[model] = callback
+                BaseManager.add_change_listener(model, callback)
+
+    @staticmethod
+    def generation_key(model) -> str:
+        return f"{model.__tablename__}:generation"
+
+    def generation(self, model) -> str:
+        self.watch(model)
+        key = self.generation_key(model)
+        token = self.backend.get(key)
+        if token is not None:
+            return token
+
+        # locked, so concurrent first lookups in this worker agree on one token
+        with self._lock:
+            token = self.backend.get(key)
+            if token is None:
+                # a random token, so a generation evicted from the backend never comes back
+                token = uuid.uuid4().hex
+                self.backend.set(key, token)
+            return token
+
+    def invalidate(self, model, instance=None):
+        self.backend.set(self.generation_key(model), uuid.uuid4().hex)
+
+    def make_key(self, model, *parts) -> str:
+        raw = json.dumps(parts, sort_keys=True, default=str)
+        digest = hashlib.sha256(raw.encode()).hexdigest()
+        return f"{model.__tablename__}:{self.generation(model)}:{digest}"
+
+    def get_or_set(self, model, parts: tuple, loader):
+        key = self.make_key(model, *parts)
+        value = self.backend.get(key, _missing)
+        if value is not _missing:
+            return thaw(value)
+
+        with self._lock:
+            lock, waiters = self._key_locks.get(key, (Lock(), 0))
+            self._key_locks[key] = (lock, waiters + 1)
+        try:
+            with lock:
+                # whoever held the lock before us has likely filled the entry
+                value = self.backend.get(key, _missing)
+                if value is not _missing:
+                    return thaw(value)
+                value = loader()
+                self.backend.set(key, freeze(value), self.ttl)
+                return value
+        finally:
+            with self._lock:
+                lock, waiters = self._key_locks[key]
+                if waiters == 1:
+                    del self._key_locks[key]
+                else:
+                    self._key_locks[key] = (lock, waiters - 1)
+
+    async def aget_or_set(self, model, parts: tuple, loader):
+        key = self.make_key(model, *parts)
+        while True:
+            value = self.backend.get(key, _missing)
+            if value is not _missing:
+                return thaw(value)
+
+            pending = self._pending.get(key)
+            if pending is None:
+                break
+            # asyncio.wait raises only when this caller is cancelled, not when the loader's caller was
+            await asyncio.wait([pending])
+            if not pending.cancelled():
+                return thaw(pending.result())
+            # the loading request was cancelled, someone else loads it now
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await loader()
+            frozen = freeze(value)
+            self.backend.set(key, frozen, self.ttl)
+            future.set_result(frozen)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # the waiters re-raise it, don't report it as never retrieved
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+
+    def clear(self):
+        self.backend.clear()
+
+    def close(self):
+        """Stop listening for model changes; a cache that is garbage collected does this itself."""
+        self._finalizer()
@@ -1,8 +1,41 @@
 import json
+from datetime import date, datetime, time
+from decimal import Decimal
 from typing import Any
+from uuid import UUID
 
 from starlette.responses import JSONResponse
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_default(obj: Any):
+    # orjson handles datetime, date and UUID natively; the stdlib fallback needs all of them
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dump_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=json_default,
+    ).encode("utf-8")
+
 
 class CJSONResponse(JSONResponse):
 
@@ -19,10 +52,4 @@ class CJSONResponse(JSONResponse):
         except (IndexError, TypeError, KeyError):
             pass
 
-        return json.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-        ).encode("utf-8")
+        return dump_json(content)
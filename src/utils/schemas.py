@@ -1,5 +1,5 @@
 from datetime import datetime, date
-from typing import List, TypeVar, Generic, Optional, Union
+from typing import List, Literal, TypeVar, Generic, Optional, Union
 
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
@@ -23,6 +23,8 @@ class BaseReadSchema(BaseSchema):
 class PageFilter(BaseModel):
     page_index: int = 1
     page_size: int = 10
+    cursor: str | None = None
+    count_mode: Literal["auto", "exact", "estimated", "none"] = "auto"
 
 
 class BaseFilter(PageFilter):
@@ -48,8 +50,11 @@ class PaginatedResponse(GenericModel, Generic[GenericResultsType]):
     previous: str | None
     total_count: int | None = 0
     total_page: int | None = 0
-    page_index: int
+    page_index: int | None
     page_size: int
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+    count_mode: str | None = None
     results: List[GenericResultsType]
 
     class Config:
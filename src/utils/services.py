@@ -3,14 +3,56 @@ from typing import Union
 from fastapi import HTTPException
 from pydantic import BaseModel
 from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
 
-from src.utils.get_objects import Paginator
+from src.utils.conditional import is_not_modified, make_etag, not_modified_response, set_validators
+from src.utils.query_cache import QueryCache
+from src.utils.get_objects import Paginator, AsyncPaginator, CursorPaginator, AsyncCursorPaginator
+from src.utils.response_classes import CJSONResponse
 from src.utils.schemas import ResponseSchema, PageFilter, PaginatedResponse
+from src.utils.serializers import rows_fragment, RowExporter
 
 
 class GenericCRUDService:
-    def __init__(self, model):
+    # page with opaque (created, id) cursors instead of page_index/OFFSET
+    cursor_pagination = False
+    # list methods return a CJSONResponse whose rows are serialized in one batch
+    # straight from the ORM, skipping the per row dicts and ResponseSchema validation;
+    # UTC datetimes come out as "...Z" instead of "...+00:00"
+    fast_serialization = False
+    # list methods only load the columns the response schema reads
+    column_projection = True
+    # searches order their matches by the search backend's relevance score;
+    # ignored with cursor pagination, whose cursors follow (created, id)
+    search_rank = False
+    # get and list send ETag / Last-Modified built from `updated` and answer
+    # conditional requests for unchanged data with an empty 304
+    conditional_requests = False
+
+    def __init__(self, model, cache: QueryCache = None):
         self.model = model
+        # opt in cache for get and list results, dropped on any write to the model
+        self.cache = cache
+
+    def cache_parts(self, request: Request, *parts) -> tuple:
+        # get_queryset receives the user, so results are cached per user
+        user = request.scope.get("user") if request is not None else None
+        url = str(request.url) if request is not None else None
+        return (getattr(user, "id", None), url, self.fast_serialization) + parts
+
+    def cached(self, request: Request, parts: tuple, loader):
+        if self.cache is None:
+            return loader()
+        return self.cache.get_or_set(self.model, self.cache_parts(request, *parts), loader)
+
+    def conditional_response(self, request: Request, etag: str, last_modified, loader):
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+
+        response = loader()
+        if not isinstance(response, Response):
+            response = CJSONResponse(content=response.dict())
+        return set_validators(response, etag, last_modified)
 
     def get_queryset(self, user, search_kwargs: dict = None, **kwargs):
         return self.model.valid_objects.filter_query(**kwargs, search_kwargs=search_kwargs)
@@ -37,24 +79,65 @@ class GenericCRUDService:
     def get(
             self, request: Request, obj_id: int, out_schema: BaseModel
     ) -> ResponseSchema:
+        if not self.conditional_requests:
+            data = self.cached(
+                request,
+                ("get", obj_id, out_schema),
+                lambda: out_schema.model_validate(self.get_object(request, obj_id)).model_dump(),
+            )
+            return ResponseSchema(success=True, data=data, message="Data retrieved successfully")
+
         obj = self.get_object(request, obj_id)
+        etag = make_etag(*self.cache_parts(request, "get", out_schema, obj.updated))
 
-        return ResponseSchema(
-            success=True,
-            data=out_schema.model_validate(obj).model_dump(),
-            message="Data retrieved successfully",
-        )
+        def load():
+            data = self.cached(
+                request, ("get", obj_id, out_schema), lambda: out_schema.model_validate(obj).model_dump()
+            )
+            return ResponseSchema(success=True, data=data, message="Data retrieved successfully")
 
-    def filter_queryset(self, request: Request, page_filter: PageFilter, search_kwargs: dict = None):
+        return self.conditional_response(request, etag, obj.updated, load)
+
+    def filter_queryset(
+            self, request: Request, page_filter: PageFilter, search_kwargs: dict = None, out_schema: BaseModel = None
+    ):
         filters = page_filter.dict()
         filters = {
             key: value for key, value in filters.items()
             if value is not None and key not in PageFilter().dict()
         }
+        if search_kwargs and self.search_rank and not self.cursor_pagination:
+            filters['search_rank'] = True
         if filters:
-            return self.get_queryset(request.user, search_kwargs=search_kwargs, **filters)
+            queryset = self.get_queryset(request.user, search_kwargs=search_kwargs, **filters)
+        else:
+            queryset = self.get_queryset(request.user, search_kwargs=search_kwargs)
 
-        return self.get_queryset(request.user, search_kwargs=search_kwargs)
+        if out_schema is not None and self.column_projection:
+            return self.model.valid_objects.project(queryset, out_schema)
+        return queryset
+
+    def list_response(self, response_schema, items, page_data: dict = None):
+        if not self.fast_serialization:
+            results = [response_schema.from_orm(item).dict() for item in items]
+            return ResponseSchema(
+                success=True,
+                data=results if page_data is None else PaginatedResponse(**page_data, results=results),
+                message="Data retrieved successfully",
+            )
+
+        data = rows_fragment(response_schema, items)
+        if page_data is not None:
+            data = {
+                **{
+                    name: page_data.get(name, field.default)
+                    for name, field in PaginatedResponse.__fields__.items() if name != "results"
+                },
+                "results": data,
+            }
+        return CJSONResponse(
+            content={"data": data, "success": True, "message": "Data retrieved successfully"}
+        )
 
     def list(
             self,
@@ -64,27 +147,56 @@ class GenericCRUDService:
             role_id=None,
             search_kwargs: dict = None
     ):
+        def load():
+            return self.cached(
+                request,
+                ("list", page_filter.dict(), search_kwargs, response_schema),
+                lambda: self.load_list(request, page_filter, response_schema, search_kwargs),
+            )
+
+        if not self.conditional_requests:
+            return load()
+
+        # any insert, update or (soft) delete within the filtered rows moves max(updated) or the count.
+        # No Last-Modified: removing the newest row lowers max(updated), so If-Modified-Since would
+        # answer 304 for a list that changed; only the ETag, which includes the count, is reliable
         queryset = self.filter_queryset(request, page_filter, search_kwargs=search_kwargs)
+        last_modified, count = self.model.valid_objects.last_modified(queryset)
+        etag = make_etag(*self.cache_parts(request, "list", response_schema, last_modified, count))
+        return self.conditional_response(request, etag, None, load)
+
+    def load_list(self, request, page_filter, response_schema, search_kwargs=None):
+        queryset = self.filter_queryset(
+            request, page_filter, search_kwargs=search_kwargs, out_schema=response_schema
+        )
 
+        if self.cursor_pagination:
+            return self.cursor_paginated_list(request, queryset, page_filter, response_schema)
         return self.paginated_list(request, queryset, page_filter, response_schema)
 
+    def cursor_paginated_list(self, request, queryset, page_filter, response_schema):
+        page = CursorPaginator(
+            model=self.model,
+            queryset=queryset,
+            request=request,
+            per_page=page_filter.page_size,
+            cursor=page_filter.cursor,
+        )
+        page_data = page.get_page()
+
+        return self.list_response(response_schema, page.object_list(), page_data)
+
     def paginated_list(self, request, queryset, page_filter, response_schema):
         page = Paginator(
             model=self.model,
             queryset=queryset,
             request=request,
             per_page=page_filter.page_size,
+            count_mode=page_filter.count_mode,
         )
-        response = PaginatedResponse(
-            **page.get_page(page_filter.page_index),
-            results=[response_schema.from_orm(item).dict() for item in page.object_list()]
-        )
+        page_data = page.get_page(page_filter.page_index)
 
-        return ResponseSchema(
-            success=True,
-            data=response,
-            message="Data retrieved successfully",
-        )
+        return self.list_response(response_schema, page.object_list(), page_data)
 
     def unpaginated_list(
             self,
@@ -94,14 +206,33 @@ class GenericCRUDService:
             search_kwargs: dict = None
     ):
 
-        queryset = self.filter_queryset(request, page_filter, search_kwargs)
+        queryset = self.filter_queryset(request, page_filter, search_kwargs, out_schema=response_schema)
 
-        return ResponseSchema(
-            success=True,
-            data=[response_schema.from_orm(item).dict() for item in queryset],
-            message="Data retrieved successfully",
+        return self.list_response(response_schema, queryset)
+
+    def export_response(self, exporter: RowExporter, chunks) -> StreamingResponse:
+        filename = f"{self.model.__tablename__}.{exporter.export_format}"
+        return StreamingResponse(
+            chunks,
+            media_type=exporter.media_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
         )
 
+    def export(
+            self,
+            request: Request,
+            page_filter: PageFilter,
+            response_schema: BaseModel,
+            search_kwargs: dict = None,
+            export_format: str = "ndjson",
+    ) -> StreamingResponse:
+        """Stream every row matching the filters as NDJSON or CSV, one cursor batch at a time."""
+        exporter = RowExporter(response_schema, export_format)
+        queryset = self.filter_queryset(request, page_filter, search_kwargs, out_schema=response_schema)
+        partitions = self.model.valid_objects.stream_partitions(queryset)
+
+        return self.export_response(exporter, exporter.iter_chunks(partitions))
+
     def update(
             self, request: Request, obj_id: int, payload, out_schema: BaseModel
     ) -> ResponseSchema[Union[dict]]:
@@ -121,3 +252,169 @@ class GenericCRUDService:
             success=True,
             message="Data deleted successfully",
         )
+
+
+class AsyncGenericCRUDService(GenericCRUDService):
+    """
+    Awaitable counterpart of GenericCRUDService for async routes. Querysets are
+    2.0 style Select statements executed on the request's AsyncSession.
+    """
+
+    def get_queryset(self, user, search_kwargs: dict = None, **kwargs):
+        return self.model.valid_objects.select_query(**kwargs, search_kwargs=search_kwargs)
+
+    async def get_object(self, request: Request, obj_id: int):
+        try:
+            return await self.model.valid_objects.aget(id=obj_id)
+
+        except self.model.DoesNotExist:
+            raise HTTPException(status_code=404)
+
+    async def create(
+            self, request, payload, out_schema: BaseModel
+    ) -> ResponseSchema[Union[dict]]:
+        obj = await self.model.valid_objects.acreate(**payload)
+        return ResponseSchema(
+            success=True,
+            data=out_schema.model_validate(obj).model_dump(),
+            message="Item created successfully",
+        )
+
+    async def acached(self, request: Request, parts: tuple, loader):
+        if self.cache is None:
+            return await loader()
+        return await self.cache.aget_or_set(self.model, self.cache_parts(request, *parts), loader)
+
+    async def aconditional_response(self, request: Request, etag: str, last_modified, loader):
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+
+        response = await loader()
+        if not isinstance(response, Response):
+            response = CJSONResponse(content=response.dict())
+        return set_validators(response, etag, last_modified)
+
+    async def get(
+            self, request: Request, obj_id: int, out_schema: BaseModel
+    ) -> ResponseSchema:
+        if not self.conditional_requests:
+            async def load():
+                return out_schema.model_validate(await self.get_object(request, obj_id)).model_dump()
+
+            data = await self.acached(request, ("get", obj_id, out_schema), load)
+            return ResponseSchema(success=True, data=data, message="Data retrieved successfully")
+
+        obj = await self.get_object(request, obj_id)
+        etag = make_etag(*self.cache_parts(request, "get", out_schema, obj.updated))
+
+        async def serialize():
+            return out_schema.model_validate(obj).model_dump()
+
+        async def load_response():
+            data = await self.acached(request, ("get", obj_id, out_schema), serialize)
+            return ResponseSchema(success=True, data=data, message="Data retrieved successfully")
+
+        return await self.aconditional_response(request, etag, obj.updated, load_response)
+
+    async def list(
+            self,
+            request: Request,
+            page_filter: PageFilter,
+            response_schema: BaseModel,
+            role_id=None,
+            search_kwargs: dict = None
+    ):
+        async def load():
+            return await self.acached(
+                request,
+                ("list", page_filter.dict(), search_kwargs, response_schema),
+                lambda: self.load_list(request, page_filter, response_schema, search_kwargs),
+            )
+
+        if not self.conditional_requests:
+            return await load()
+
+        queryset = self.filter_queryset(request, page_filter, search_kwargs=search_kwargs)
+        last_modified, count = await self.model.valid_objects.alast_modified(queryset)
+        etag = make_etag(*self.cache_parts(request, "list", response_schema, last_modified, count))
+        return await self.aconditional_response(request, etag, None, load)
+
+    async def load_list(self, request, page_filter, response_schema, search_kwargs=None):
+        queryset = self.filter_queryset(
+            request, page_filter, search_kwargs=search_kwargs, out_schema=response_schema
+        )
+
+        if self.cursor_pagination:
+            return await self.cursor_paginated_list(request, queryset, page_filter, response_schema)
+        return await self.paginated_list(request, queryset, page_filter, response_schema)
+
+    async def cursor_paginated_list(self, request, queryset, page_filter, response_schema):
+        page = AsyncCursorPaginator(
+            model=self.model,
+            queryset=queryset,
+            request=request,
+            per_page=page_filter.page_size,
+            cursor=page_filter.cursor,
+        )
+        page_data = await page.get_page()
+
+        return self.list_response(response_schema, page.object_list(), page_data)
+
+    async def paginated_list(self, request, queryset, page_filter, response_schema):
+        page = AsyncPaginator(
+            model=self.model,
+            queryset=queryset,
+            request=request,
+            per_page=page_filter.page_size,
+            count_mode=page_filter.count_mode,
+        )
+        page_data = await page.get_page(page_filter.page_index)
+
+        return self.list_response(response_schema, page.object_list(), page_data)
+
+    async def unpaginated_list(
+            self,
+            request: Request,
+            page_filter: None | PageFilter,
+            response_schema: BaseModel,
+            search_kwargs: dict = None
+    ):
+
+        queryset = self.filter_queryset(request, page_filter, search_kwargs, out_schema=response_schema)
+        items = await self.model.valid_objects.ascalars(queryset)
+
+        return self.list_response(response_schema, items)
+
+    async def export(
+            self,
+            request: Request,
+            page_filter: PageFilter,
+            response_schema: BaseModel,
+            search_kwargs: dict = None,
+            export_format: str = "ndjson",
+    ) -> StreamingResponse:
+        exporter = RowExporter(response_schema, export_format)
+        queryset = self.filter_queryset(request, page_filter, search_kwargs, out_schema=response_schema)
+        partitions = self.model.valid_objects.astream_partitions(queryset)
+
+        return self.export_response(exporter, exporter.aiter_chunks(partitions))
+
+    async def update(
+            self, request: Request, obj_id: int, payload, out_schema: BaseModel
+    ) -> ResponseSchema[Union[dict]]:
+        obj = await self.get_object(request, obj_id)
+        await self.model.valid_objects.aupdate(id=obj.id, data=payload)
+
+        return ResponseSchema(
+            success=True,
+            data=out_schema.model_validate(obj).model_dump(),
+            message="Data updated successfully",
+        )
+
+    async def delete(self, request: Request, obj_id: int) -> ResponseSchema:
+        obj = await self.get_object(request, obj_id)
+        await obj.adelete()
+        return ResponseSchema(
+            success=True,
+            message="Data deleted successfully",
+        )
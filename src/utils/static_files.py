@@ -0,0 +1,66 @@
+import mimetypes
+import os
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from src.config import MEDIA_CACHE_MAX_AGE
+from src.middlewares.compression import negotiate_encoding
+
+# suffix of the precompressed sibling of a file, e.g. report.json.br
+PRECOMPRESSED_SUFFIXES = {"zstd": ".zst", "br": ".br", "gzip": ".gz"}
+
+# content-addressed files never change under their key, so clients and proxies may keep them for good
+IMMUTABLE_PREFIXES = ("cas/", "derivatives/")
+IMMUTABLE_CACHE_CONTROL = f"public, max-age={MEDIA_CACHE_MAX_AGE}, immutable"
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Serves ``<file>.zst``, ``<file>.br`` or ``<file>.gz`` in place of ``<file>``
+    when it exists next to it and the client accepts that encoding, so media is
+    compressed once ahead of time instead of on every request.
+    Content-addressed files are served with a long-lived Cache-Control.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304) and path.replace(os.sep, "/").startswith(IMMUTABLE_PREFIXES):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    def precompressed_variant(self, full_path, scope: Scope):
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        available = dict(PRECOMPRESSED_SUFFIXES)
+        while available:
+            encoding = negotiate_encoding(accept_encoding, available)
+            if encoding is None:
+                return None
+            variant = f"{full_path}{available.pop(encoding)}"
+            try:
+                return encoding, variant, os.stat(variant)
+            except OSError:
+                continue
+        return None
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        variant = self.precompressed_variant(full_path, scope)
+        if variant is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            if status_code == 200:
+                response.headers.add_vary_header("Accept-Encoding")
+            return response
+
+        encoding, variant_path, variant_stat = variant
+        response = FileResponse(
+            variant_path,
+            status_code=status_code,
+            stat_result=variant_stat,
+            media_type=mimetypes.guess_type(str(full_path))[0] or "text/plain",
+            headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -1,14 +1,279 @@
+import glob
+import hashlib
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import NamedTuple
 from urllib.parse import urljoin
 
-from src.config import MEDIA_URL
+import anyio
+from sqlalchemy import delete, select
+
+from src.config import MEDIA_URL, MEDIA_ROOT, MAX_FILE_SIZE, UPLOAD_CHUNK_SIZE, STORAGE_GC_GRACE
+from src.management.models import StoredBlob
+
+
+class SavedFile(NamedTuple):
+    path: str  # relative to MEDIA_ROOT, with forward slashes
+    sha256: str
+    size: int
+
+
+def current_umask() -> int:
+    # os.umask can only be read by setting it, so this runs once, at import
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+# what open() would have given a new file; mkstemp creates files readable by their owner only
+FILE_MODE = 0o666 & ~current_umask()
+
+
+def make_readable(path: str):
+    """Give a temp file the permissions of a normally created file before it is published."""
+    os.chmod(path, FILE_MODE)
+
+
+def size_exceeded_error(max_size: int) -> ValueError:
+    return ValueError(
+        "File size exceeds the maximum allowed size ({} MB).".format(max_size / (1024 * 1024))
+    )
+
+
+def create_temp_file(file_dir: str) -> str:
+    os.makedirs(file_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=file_dir, prefix=".upload-", suffix=".part")
+    os.close(fd)
+    return temp_path
+
+
+def remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def write_upload(file, file_dir: str, max_size: int = MAX_FILE_SIZE) -> tuple:
+    """
+    Copy an upload into a temp file in ``file_dir`` in UPLOAD_CHUNK_SIZE chunks,
+    hashing it on the way and giving up as soon as it passes ``max_size``.
+    Returns (temp_path, sha256, size); the temp file is removed on failure.
+    """
+    temp_path = create_temp_file(file_dir)
+    digest, size = hashlib.sha256(), 0
+    try:
+        with open(temp_path, "wb") as buffer:
+            while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise size_exceeded_error(max_size)
+                digest.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        remove_file(temp_path)
+        raise
+    return temp_path, digest.hexdigest(), size
+
+
+async def awrite_upload(file, file_dir: str, max_size: int = MAX_FILE_SIZE) -> tuple:
+    """write_upload with every file system call off the event loop."""
+    temp_path = await anyio.to_thread.run_sync(create_temp_file, file_dir)
+    digest, size = hashlib.sha256(), 0
+    try:
+        async with await anyio.open_file(temp_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise size_exceeded_error(max_size)
+                digest.update(chunk)
+                await buffer.write(chunk)
+    except BaseException:
+        with anyio.CancelScope(shield=True):
+            await anyio.to_thread.run_sync(remove_file, temp_path)
+        raise
+    return temp_path, digest.hexdigest(), size
+
+
+def content_key(sha256: str, filename: str = None) -> str:
+    """``cas/ab/cd/abcd...<ext>``: two levels of 256 shards keep every directory small."""
+    extension = os.path.splitext(filename or "")[1].lower()
+    return f"cas/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+
+
+def content_sha256(key: str) -> str:
+    return os.path.splitext(key.rsplit("/", 1)[-1])[0]
+
+
+def derived_prefix(sha256: str) -> str:
+    """Where files made from a blob (e.g. resized images) are kept: ``derivatives/ab/cd/abcd..._``."""
+    return f"derivatives/{sha256[:2]}/{sha256[2:4]}/{sha256}_"
+
+
+class StorageBackend:
+    """
+    Where stored files live. Keys are relative, forward slash paths; uploads are
+    staged in a local temp file first, then handed to ``put``. An S3 compatible
+    backend implements the same methods against a bucket.
+    """
+
+    def staging_dir(self) -> str:
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def put(self, key: str, temp_path: str):
+        """Store ``temp_path`` under ``key``, consuming the temp file."""
+        raise NotImplementedError
+
+    def open(self, key: str):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str):
+        """Delete every stored file whose key starts with ``prefix``."""
+        raise NotImplementedError
+
+
+class LocalStorageBackend(StorageBackend):
+    def __init__(self, root: str = MEDIA_ROOT):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def staging_dir(self) -> str:
+        # inside root, so put is a same file system rename
+        return os.path.join(self.root, "cas", ".staging")
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def put(self, key: str, temp_path: str):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        make_readable(temp_path)
+        # same key means same bytes, so replacing an existing copy is harmless
+        os.replace(temp_path, path)
+
+    def open(self, key: str):
+        return open(self.path(key), "rb")
+
+    def delete(self, key: str):
+        remove_file(self.path(key))
+
+    def delete_prefix(self, prefix: str):
+        for path in glob.glob(glob.escape(self.path(prefix)) + "*"):
+            remove_file(path)
 
 
 class Storage:
+    """
+    Content-addressed media storage: each distinct file is stored once, under
+    its sha256, and a StoredBlob row counts the records referencing it.
+    """
     BASE_URL: str = ""
 
+    def __init__(self, backend: StorageBackend = None):
+        self.backend = backend or LocalStorageBackend()
+
     @property
     def media_storage(self):
         return urljoin(self.BASE_URL, MEDIA_URL)
 
+    def url(self, key: str) -> str:
+        return urljoin(self.media_storage, key)
+
+    def add_reference(self, key: str, size: int):
+        # one statement: a new blob starts at one reference, a known one counts one more
+        StoredBlob.objects.bulk_upsert(
+            [{"key": key, "size": size}], ["key"],
+            update_fields=[], update_values={"ref_count": StoredBlob.ref_count + 1},
+        )
+
+    async def aadd_reference(self, key: str, size: int):
+        await StoredBlob.objects.abulk_upsert(
+            [{"key": key, "size": size}], ["key"],
+            update_fields=[], update_values={"ref_count": StoredBlob.ref_count + 1},
+        )
+
+    def store(self, key: str, temp_path: str):
+        # identical bytes are written once; later uploads only add a reference
+        if not self.backend.exists(key):
+            self.backend.put(key, temp_path)
+
+    def save(self, file, max_size: int = MAX_FILE_SIZE) -> SavedFile:
+        temp_path, sha256, size = write_upload(file, self.backend.staging_dir(), max_size)
+        key = content_key(sha256, file.filename)
+        try:
+            # referenced before it is written, so garbage collection never removes it mid upload
+            self.add_reference(key, size)
+            try:
+                self.store(key, temp_path)
+            except BaseException:
+                self.release(key)
+                raise
+        finally:
+            remove_file(temp_path)
+        return SavedFile(key, sha256, size)
+
+    async def asave(self, file, max_size: int = MAX_FILE_SIZE) -> SavedFile:
+        staging_dir = await anyio.to_thread.run_sync(self.backend.staging_dir)
+        temp_path, sha256, size = await awrite_upload(file, staging_dir, max_size)
+        key = content_key(sha256, file.filename)
+        try:
+            await self.aadd_reference(key, size)
+            try:
+                await anyio.to_thread.run_sync(partial(self.store, key, temp_path))
+            except BaseException:
+                with anyio.CancelScope(shield=True):
+                    await self.arelease(key)
+                raise
+        finally:
+            with anyio.CancelScope(shield=True):
+                await anyio.to_thread.run_sync(remove_file, temp_path)
+        return SavedFile(key, sha256, size)
+
+    def release(self, key: str):
+        """Drop one reference; the file itself goes at the next collect_garbage."""
+        StoredBlob.objects.bulk_update({"ref_count": StoredBlob.ref_count - 1}, key=key)
+
+    async def arelease(self, key: str):
+        await StoredBlob.objects.abulk_update({"ref_count": StoredBlob.ref_count - 1}, key=key)
+
+    def collect_garbage(self, grace: int = STORAGE_GC_GRACE) -> int:
+        """
+        Delete blobs nobody has referenced for ``grace`` seconds. Each blob's row is
+        deleted on the condition that it is still unreferenced, and the file is
+        unlinked before that delete commits. A concurrent upload of the same bytes
+        either bumps the count first, so the delete misses, or waits for the
+        commit, inserts a new row and finds the file gone, so it writes it again.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace)
+        unreferenced = (StoredBlob.ref_count <= 0, StoredBlob.updated < cutoff)
+        session = StoredBlob.objects.db()
+        keys = session.scalars(select(StoredBlob.key).where(*unreferenced)).all()
+
+        deleted = 0
+        for key in keys:
+            try:
+                result = session.execute(delete(StoredBlob).where(StoredBlob.key == key, *unreferenced))
+                if result.rowcount:
+                    self.backend.delete(key)
+                    self.backend.delete_prefix(derived_prefix(content_sha256(key)))
+                    deleted += 1
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                raise e
+        if deleted:
+            StoredBlob.objects.notify_change()
+        return deleted
+
 
 storage = Storage()
@@ -1,4 +1,3 @@
-import asyncio
 import re
 import string
 from typing import List, Optional, Set
@@ -116,14 +115,24 @@ def validate_password(passwords: str) -> bool:
     return True
 
 
-def image_validator(file: UploadFile) -> bool:
+def upload_size(file: UploadFile) -> int:
+    # starlette records the size while parsing the form, so the file needn't be read
+    if file.size is not None:
+        return file.size
+
+    position = file.file.tell()
     file.file.seek(0, 2)
-    file_size = file.file.tell()
+    size = file.file.tell()
+    file.file.seek(position)
+    return size
+
+
+def image_validator(file: UploadFile) -> bool:
+    file_size = upload_size(file)
 
-    asyncio.run(file.seek(0))
     max_size = FILE_PARAMETERS.MAX_FILE_SIZE
     if file_size > FILE_PARAMETERS.MAX_FILE_SIZE:
-        f"File size exceeds the maximum allowed size ({max_size/(1024*1024)} MB)."
+        raise ImageError(f"File size exceeds the maximum allowed size ({max_size/(1024*1024)} MB).")
 
     # check the content type (MIME type)
     content_type = file.content_type
@@ -173,10 +182,8 @@ def file_validator(file: UploadFile):
         )
 
     max_size = FILE_PARAMETERS.MAX_FILE_SIZE  # 5 MB
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
+    file_size = upload_size(file)
 
-    asyncio.run(file.seek(0))
     if file_size > max_size:
         raise ValueError(
             "File size exceeds the maximum allowed size ({} MB).".format(
@@ -189,22 +196,15 @@ def file_validator(file: UploadFile):
 
 def user_validator(values: Optional[Set[int]]) -> List[int]:
     # a util function to validate if user is not a super-admin
+    users = User.valid_objects.get_many(values)
+
     if len(values) == 1:
-        try:
-            user: User = User.valid_objects.get(id=list(values)[0])
-            if user.is_superadmin:
-                raise ValueError("Permission Denied: You cannot perform this operation")
-        except User.DoesNotExist:
+        user: User = users.get(next(iter(values)))
+        if user is None:
             raise ValueError("The user was not found")
+        if user.is_superadmin:
+            raise ValueError("Permission Denied: You cannot perform this operation")
 
         return values
 
-    validated_users = []
-    for value in values:
-        try:
-            user: User = User.valid_objects.get(id=value)
-            if not user.is_superadmin:
-                validated_users.append(value)
-        except User.DoesNotExist:
-            pass
-    return validated_users
+    return [value for value in values if value in users and not users[value].is_superadmin]